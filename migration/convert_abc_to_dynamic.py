@@ -85,8 +85,7 @@ def create_legacy_approach_A() -> ApproachPattern:
             failure_count=0,
             success_rate=0.0,
             vs_alternatives={},
-            recent_quality_trend="new",
-            quality_history=[]
+            recent_quality_trend="new"
         ),
         
         parent_id=None,
@@ -165,8 +164,7 @@ def create_legacy_approach_B() -> ApproachPattern:
             failure_count=0,
             success_rate=0.0,
             vs_alternatives={},
-            recent_quality_trend="new",
-            quality_history=[]
+            recent_quality_trend="new"
         ),
         
         parent_id=None,
@@ -246,8 +244,7 @@ def create_legacy_approach_C() -> ApproachPattern:
             failure_count=0,
             success_rate=0.0,
             vs_alternatives={},
-            recent_quality_trend="new",
-            quality_history=[]
+            recent_quality_trend="new"
         ),
         
         parent_id=None,
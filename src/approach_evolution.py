@@ -73,8 +73,7 @@ class ApproachEvolution:
             failure_count=0,
             success_rate=0.0,
             vs_alternatives={},
-            recent_quality_trend="new",
-            quality_history=[]
+            recent_quality_trend="new"
         )
         
         # Extract tags
@@ -152,15 +151,15 @@ class ApproachEvolution:
         scores.append(complexity_sim)
         
         # Keyword overlap
-        keywords1 = set(sig1.keyword_patterns)
-        keywords2 = set(sig2.keyword_patterns)
+        keywords1 = sig1.keyword_set
+        keywords2 = sig2.keyword_set
         if keywords1 or keywords2:
             keyword_sim = len(keywords1 & keywords2) / len(keywords1 | keywords2)
             scores.append(keyword_sim)
         
         # Output type overlap
-        outputs1 = set(sig1.output_types)
-        outputs2 = set(sig2.output_types)
+        outputs1 = sig1.output_type_set
+        outputs2 = sig2.output_type_set
         if outputs1 or outputs2:
             output_sim = len(outputs1 & outputs2) / len(outputs1 | outputs2)
             scores.append(output_sim)
@@ -354,11 +353,20 @@ class ApproachEvolution:
         import copy
         refined = copy.deepcopy(signature)
         
-        # Adjust domain weights toward successful executions (80% old, 20% new)
+        # Adjust domain weights toward successful executions (80% old, 20% new),
+        # tracking the complexity range in the same pass
         new_domain_weights = {}
+        complexity_min = refined.complexity_min
+        complexity_max = refined.complexity_max
         for record in high_quality_executions:
             for domain, weight in record.task_context.domain_weights.items():
                 new_domain_weights[domain] = new_domain_weights.get(domain, 0.0) + weight * record.actual_quality
+            
+            complexity = record.task_context.complexity
+            if complexity < complexity_min:
+                complexity_min = complexity
+            if complexity > complexity_max:
+                complexity_max = complexity
         
         total = sum(new_domain_weights.values())
         if total > 0:
@@ -370,11 +378,9 @@ class ApproachEvolution:
                 new_weight = new_domain_weights.get(domain, 0.0)
                 refined.domain_weights[domain] = 0.8 * old_weight + 0.2 * new_weight
         
-        # Refine complexity range
-        complexities = [e.task_context.complexity for e in high_quality_executions]
-        if complexities:
-            refined.complexity_min = min(refined.complexity_min, min(complexities))
-            refined.complexity_max = max(refined.complexity_max, max(complexities))
+        # Refine complexity range (widened to cover the executions)
+        refined.complexity_min = complexity_min
+        refined.complexity_max = complexity_max
         
         return refined
     
@@ -3,7 +3,8 @@ Approach Matching Algorithm
 Scores how well tasks match approach patterns
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from src.approach_patterns import PatternSignature, TaskContext, ApproachPattern
 
 
@@ -139,16 +140,33 @@ def calculate_keyword_match(
         return 0.0
     
     # Convert task keywords to set for fast lookup
-    task_keywords_set = set(kw.lower() for kw in task_keywords)
+    task_keywords_set = frozenset(kw.lower() for kw in task_keywords)
     
-    # Calculate weighted matches
+    return _score_keywords(task_keywords_set, _prepare_keywords(signature_keywords))
+
+
+def _prepare_keywords(signature_keywords: Dict[str, float]) -> Tuple[Tuple[Tuple[str, float], ...], float]:
+    """Lowercase signature keywords once and total their weights"""
+    prepared = tuple((kw.lower(), weight) for kw, weight in signature_keywords.items())
     total_weight = 0.0
+    for _, weight in prepared:
+        total_weight += weight
+    return prepared, total_weight
+
+
+def _score_keywords(
+    task_keywords_set: frozenset,
+    prepared: Tuple[Tuple[Tuple[str, float], ...], float]
+) -> float:
+    """Score lowercased task keywords against prepared signature keywords"""
+    sig_keywords, total_weight = prepared
+    if not task_keywords_set or not sig_keywords:
+        return 0.0
+    
+    # Calculate weighted matches
     matched_weight = 0.0
     
-    for sig_keyword, weight in signature_keywords.items():
-        total_weight += weight
-        sig_keyword_lower = sig_keyword.lower()
-        
+    for sig_keyword_lower, weight in sig_keywords:
         # Check for exact match
         if sig_keyword_lower in task_keywords_set:
             matched_weight += weight
@@ -200,6 +218,113 @@ def match_approaches(
     return candidates[:limit]
 
 
+class SignatureIndex:
+    """
+    Vectorized matcher over a fixed set of pattern signatures
+    
+    Domain, complexity and output-type components are scored for every
+    signature at once with NumPy. Keyword matching (string containment)
+    runs in Python only for signatures that can still reach the threshold.
+    Scores equal calculate_match_score up to floating-point rounding.
+    """
+    
+    def __init__(self, signatures: List[Tuple[str, PatternSignature]]):
+        self.approach_ids = [aid for aid, _ in signatures]
+        self.signatures = dict(signatures)
+        self._signature_list = [sig for _, sig in signatures]
+        
+        count = len(signatures)
+        domains = sorted({d for _, sig in signatures for d in sig.domain_weights})
+        outputs = sorted({o for _, sig in signatures for o in sig.output_types})
+        self._domain_index = {d: i for i, d in enumerate(domains)}
+        self._output_index = {o: i for i, o in enumerate(outputs)}
+        
+        self._domain_matrix = np.zeros((count, len(domains)))
+        self._output_matrix = np.zeros((count, len(outputs)))
+        self._complexity_min = np.empty(count)
+        self._complexity_max = np.empty(count)
+        
+        # Lowercased keywords and total weight per signature
+        self._keywords = [_prepare_keywords(sig.keyword_weights) for sig in self._signature_list]
+        
+        for row, sig in enumerate(self._signature_list):
+            for domain, weight in sig.domain_weights.items():
+                self._domain_matrix[row, self._domain_index[domain]] = weight
+            for output_type in sig.output_types:
+                self._output_matrix[row, self._output_index[output_type]] = 1.0
+            self._complexity_min[row] = sig.complexity_min
+            self._complexity_max[row] = sig.complexity_max
+    
+    def __len__(self) -> int:
+        return len(self.approach_ids)
+    
+    def match(
+        self,
+        task_context: TaskContext,
+        threshold: float = 0.5,
+        limit: Optional[int] = 10
+    ) -> List[Tuple[str, float]]:
+        """
+        Match task against all indexed signatures
+        
+        Args:
+            task_context: Task characteristics
+            threshold: Minimum match score to include
+            limit: Maximum number of matches to return (None for all)
+            
+        Returns:
+            List of (approach_id, match_score) tuples, sorted by score descending
+        """
+        count = len(self.approach_ids)
+        if count == 0:
+            return []
+        
+        # 1. Domain overlap (weighted dot product, normalized by sum of minimums)
+        task_domains = np.zeros(len(self._domain_index))
+        for domain, weight in task_context.domain_weights.items():
+            column = self._domain_index.get(domain)
+            if column is not None:
+                task_domains[column] = weight
+        
+        overlap = self._domain_matrix @ task_domains
+        max_possible = np.minimum(self._domain_matrix, task_domains).sum(axis=1)
+        normalized = max_possible > 0
+        overlap[normalized] /= max_possible[normalized]
+        domain_scores = np.minimum(1.0, overlap)
+        
+        # 2. Complexity fit (decays to 0 at distance 0.5 outside the range)
+        complexity = task_context.complexity
+        distance = np.where(
+            complexity < self._complexity_min,
+            self._complexity_min - complexity,
+            np.where(complexity > self._complexity_max, complexity - self._complexity_max, 0.0)
+        )
+        complexity_scores = np.maximum(0.0, 1.0 - distance * 2.0)
+        
+        # 4. Output type match
+        column = self._output_index.get(task_context.output_type)
+        output_scores = self._output_matrix[:, column] if column is not None else np.zeros(count)
+        
+        # Upper bound assumes a perfect keyword score; prune rows that cannot pass
+        partial = 0.4 * domain_scores + 0.2 * complexity_scores
+        upper_bound = partial + 0.2 + 0.2 * output_scores
+        
+        # 3. Keyword match (string containment) on survivors only
+        task_keywords_set = frozenset(kw.lower() for kw in task_context.keywords)
+        candidates = []
+        for row in np.flatnonzero(upper_bound >= threshold):
+            keyword_score = _score_keywords(task_keywords_set, self._keywords[row])
+            score = float(partial[row]) + 0.2 * keyword_score + 0.2 * float(output_scores[row])
+            
+            if score >= threshold:
+                candidates.append((self.approach_ids[row], score))
+        
+        # Sort by match score descending
+        candidates.sort(key=lambda x: x[1], reverse=True)
+        
+        return candidates if limit is None else candidates[:limit]
+
+
 if __name__ == "__main__":
     # Demo usage
     print("Approach Matching Algorithm Demo")
@@ -256,8 +381,7 @@ if __name__ == "__main__":
             failure_count=0,
             success_rate=0.0,
             vs_alternatives={},
-            recent_quality_trend="new",
-            quality_history=[]
+            recent_quality_trend="new"
         ),
         generation=0,
         tags=["tutorial"]
@@ -310,8 +434,7 @@ if __name__ == "__main__":
             failure_count=0,
             success_rate=0.0,
             vs_alternatives={},
-            recent_quality_trend="new",
-            quality_history=[]
+            recent_quality_trend="new"
         ),
         generation=0,
         tags=["research"]
@@ -3,10 +3,20 @@ Dynamic Approach Pattern Data Models
 Defines structures for emergent approach patterns
 """
 
-from dataclasses import dataclass, field, asdict
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from functools import cached_property
+from itertools import islice
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-import json
+from typing import Deque, Dict, FrozenSet, List, Optional, Tuple
+from src import json_codec
+
+# Slotted dataclasses for high-volume records (slots= requires Python 3.10+)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Number of recent executions kept in PerformanceMetrics.quality_history
+QUALITY_HISTORY_SIZE = 100
 
 
 @dataclass
@@ -34,9 +44,29 @@ class PatternSignature:
     requires_examples: bool
     requires_theory: bool
     
+    @cached_property
+    def keyword_set(self) -> FrozenSet[str]:
+        """keyword_patterns as a set, built on first use (signatures are not edited in place)"""
+        return frozenset(self.keyword_patterns)
+    
+    @cached_property
+    def output_type_set(self) -> FrozenSet[str]:
+        """output_types as a set, built on first use (signatures are not edited in place)"""
+        return frozenset(self.output_types)
+    
     def to_dict(self) -> dict:
         """Convert to dictionary"""
-        return asdict(self)
+        return {
+            'domain_weights': dict(self.domain_weights),
+            'complexity_min': self.complexity_min,
+            'complexity_max': self.complexity_max,
+            'keyword_patterns': list(self.keyword_patterns),
+            'keyword_weights': dict(self.keyword_weights),
+            'output_types': list(self.output_types),
+            'requires_code': self.requires_code,
+            'requires_examples': self.requires_examples,
+            'requires_theory': self.requires_theory
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'PatternSignature':
@@ -80,7 +110,24 @@ class StyleCharacteristics:
     
     def to_dict(self) -> dict:
         """Convert to dictionary"""
-        return asdict(self)
+        return {
+            'structure_type': self.structure_type,
+            'section_count': self.section_count,
+            'tone': self.tone,
+            'voice': self.voice,
+            'depth_level': self.depth_level,
+            'explanation_style': self.explanation_style,
+            'example_density': self.example_density,
+            'code_style': self.code_style,
+            'use_headers': self.use_headers,
+            'use_bullets': self.use_bullets,
+            'use_numbered_lists': self.use_numbered_lists,
+            'use_tables': self.use_tables,
+            'include_summary': self.include_summary,
+            'include_tldr': self.include_tldr,
+            'include_prerequisites': self.include_prerequisites,
+            'include_next_steps': self.include_next_steps
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'StyleCharacteristics':
@@ -115,14 +162,29 @@ class PerformanceMetrics:
     
     # Trend analysis
     recent_quality_trend: str  # "improving", "stable", "declining", "new"
-    quality_history: List[Tuple[str, float]]  # List of (timestamp_iso, quality)
+    # Recent (timestamp_iso, quality), oldest first; a fixed-size ring, old
+    # entries drop off as new ones are appended
+    quality_history: Deque[Tuple[str, float]] = field(
+        default_factory=lambda: deque(maxlen=QUALITY_HISTORY_SIZE)
+    )
     
     def to_dict(self) -> dict:
         """Convert to dictionary with datetime serialization"""
-        data = asdict(self)
-        data['first_used'] = self.first_used.isoformat()
-        data['last_used'] = self.last_used.isoformat()
-        return data
+        return {
+            'usage_count': self.usage_count,
+            'first_used': self.first_used.isoformat(),
+            'last_used': self.last_used.isoformat(),
+            'avg_quality': self.avg_quality,
+            'min_quality': self.min_quality,
+            'max_quality': self.max_quality,
+            'quality_std_dev': self.quality_std_dev,
+            'success_count': self.success_count,
+            'failure_count': self.failure_count,
+            'success_rate': self.success_rate,
+            'vs_alternatives': dict(self.vs_alternatives),
+            'recent_quality_trend': self.recent_quality_trend,
+            'quality_history': list(self.quality_history)
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'PerformanceMetrics':
@@ -130,18 +192,26 @@ class PerformanceMetrics:
         data = data.copy()
         data['first_used'] = datetime.fromisoformat(data['first_used'])
         data['last_used'] = datetime.fromisoformat(data['last_used'])
+        data['quality_history'] = deque(
+            (tuple(entry) for entry in data.get('quality_history', ())),
+            maxlen=QUALITY_HISTORY_SIZE
+        )
         return cls(**data)
     
-    def update_with_execution(self, quality: float, success: bool):
+    def update_with_execution(self, quality: float, success: bool, now: Optional[datetime] = None):
         """
         Update metrics after an execution
         
         Args:
             quality: Execution quality (0.0-1.0)
             success: Whether execution was successful
+            now: Execution time (defaults to current time)
         """
+        if now is None:
+            now = datetime.now()
+        
         self.usage_count += 1
-        self.last_used = datetime.now()
+        self.last_used = now
         
         # Update quality metrics
         if self.usage_count == 1:
@@ -159,7 +229,7 @@ class PerformanceMetrics:
             self.max_quality = max(self.max_quality, quality)
             
             # Update std dev (simplified)
-            variance = sum((q - self.avg_quality) ** 2 for _, q in self.quality_history[-100:]) / len(self.quality_history[-100:])
+            variance = sum((q - self.avg_quality) ** 2 for _, q in self.quality_history) / len(self.quality_history)
             self.quality_std_dev = variance ** 0.5
         
         # Update success metrics
@@ -170,22 +240,22 @@ class PerformanceMetrics:
         
         self.success_rate = self.success_count / self.usage_count
         
-        # Add to history (keep last 100)
-        self.quality_history.append((datetime.now().isoformat(), quality))
-        if len(self.quality_history) > 100:
-            self.quality_history = self.quality_history[-100:]
+        # Add to history (ring buffer keeps the last QUALITY_HISTORY_SIZE)
+        self.quality_history.append((now.isoformat(), quality))
         
         # Update trend
         self.recent_quality_trend = self._calculate_trend()
     
     def _calculate_trend(self) -> str:
         """Calculate recent quality trend"""
-        if len(self.quality_history) < 10:
+        history = self.quality_history
+        count = len(history)
+        if count < 10:
             return "new"
         
         # Compare last 10 vs previous 10
-        recent_10 = [q for _, q in self.quality_history[-10:]]
-        previous_10 = [q for _, q in self.quality_history[-20:-10]] if len(self.quality_history) >= 20 else recent_10
+        recent_10 = [q for _, q in islice(history, count - 10, count)]
+        previous_10 = [q for _, q in islice(history, count - 20, count - 10)] if count >= 20 else recent_10
         
         recent_avg = sum(recent_10) / len(recent_10)
         previous_avg = sum(previous_10) / len(previous_10)
@@ -237,13 +307,13 @@ class ApproachPattern:
             'performance_metrics': self.performance_metrics.to_dict(),
             'parent_id': self.parent_id,
             'generation': self.generation,
-            'tags': self.tags,
+            'tags': list(self.tags),
             'active': self.active
         }
     
     def to_json(self) -> str:
         """Convert to JSON string"""
-        return json.dumps(self.to_dict(), indent=2)
+        return json_codec.dumps(self.to_dict(), indent=True).decode('utf-8')
     
     @classmethod
     def from_dict(cls, data: dict) -> 'ApproachPattern':
@@ -259,7 +329,7 @@ class ApproachPattern:
     @classmethod
     def from_json(cls, json_str: str) -> 'ApproachPattern':
         """Create from JSON string"""
-        data = json.loads(json_str)
+        data = json_codec.loads(json_str)
         return cls.from_dict(data)
     
     def match_task(self, task_context: 'TaskContext') -> float:
@@ -276,7 +346,7 @@ class ApproachPattern:
         return calculate_match_score(task_context, self.pattern_signature)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TaskContext:
     """
     Task characteristics for matching
@@ -290,7 +360,14 @@ class TaskContext:
     
     def to_dict(self) -> dict:
         """Convert to dictionary"""
-        return asdict(self)
+        return {
+            'prompt': self.prompt,
+            'domain_weights': dict(self.domain_weights),
+            'complexity': self.complexity,
+            'keywords': list(self.keywords),
+            'output_type': self.output_type,
+            'estimated_duration': self.estimated_duration
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'TaskContext':
@@ -298,7 +375,7 @@ class TaskContext:
         return cls(**data)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ContentFeatures:
     """Extracted features from generated content"""
     
@@ -323,9 +400,27 @@ class ContentFeatures:
     example_ratio: float  # Portion that's examples
     code_ratio: float  # Portion that's code
     
+    # Structure classification
+    structure_type: str = "prose"  # "sequential_steps", "hierarchical", "prose", "bulleted"
+    
     def to_dict(self) -> dict:
         """Convert to dictionary"""
-        return asdict(self)
+        return {
+            'section_count': self.section_count,
+            'has_code_blocks': self.has_code_blocks,
+            'code_block_count': self.code_block_count,
+            'has_numbered_list': self.has_numbered_list,
+            'has_bullets': self.has_bullets,
+            'has_tables': self.has_tables,
+            'total_length': self.total_length,
+            'avg_section_length': self.avg_section_length,
+            'detected_tone': self.detected_tone,
+            'formality_score': self.formality_score,
+            'explanation_ratio': self.explanation_ratio,
+            'example_ratio': self.example_ratio,
+            'code_ratio': self.code_ratio,
+            'structure_type': self.structure_type
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'ContentFeatures':
@@ -333,7 +428,7 @@ class ContentFeatures:
         return cls(**data)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ExecutionRecord:
     """
     Record of a single execution for pattern analysis
@@ -440,8 +535,7 @@ if __name__ == "__main__":
             failure_count=0,
             success_rate=0.0,
             vs_alternatives={},
-            recent_quality_trend="new",
-            quality_history=[]
+            recent_quality_trend="new"
         ),
         
         generation=0,
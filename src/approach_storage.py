@@ -3,12 +3,15 @@ Approach Storage Layer
 File-based storage for dynamic approach patterns
 """
 
-import json
+import os
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
-from src.approach_patterns import ApproachPattern
+import numpy as np
+from src.approach_patterns import ApproachPattern, PatternSignature
+from src import json_codec
 from src.input_sanitization import sanitize_filename, sanitize_identifier
 
 
@@ -25,15 +28,21 @@ class ApproachStorage:
         self.manifest_path = self.storage_path / "manifest.json"
         self.lock = threading.RLock()  # Reentrant lock to prevent deadlock
         
+        # Vectorized quality index (rebuilt lazily when manifest changes)
+        self._quality_array = None
+        self._quality_ids = []
+        self._active_mask = None
+        
         # Initialize or load manifest
         self.manifest = self._load_or_create_manifest()
     
     def _load_or_create_manifest(self) -> Dict:
         """Load existing manifest or create new one"""
+        self._quality_array = None  # Manifest replaced, invalidate index
+        
         if self.manifest_path.exists():
             try:
-                with open(self.manifest_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return json_codec.loads(self.manifest_path.read_bytes())
             except Exception as e:
                 print(f"Error loading manifest: {e}, creating new")
         
@@ -57,8 +66,7 @@ class ApproachStorage:
         
         # Atomic write (write to temp, then rename)
         temp_path = self.manifest_path.with_suffix('.tmp')
-        with open(temp_path, 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2)
+        temp_path.write_bytes(json_codec.dumps(manifest, indent=True))
         
         # Rename to actual file (atomic on most systems)
         temp_path.replace(self.manifest_path)
@@ -82,14 +90,15 @@ class ApproachStorage:
         """
         with self.lock:
             try:
-                # Save approach to file
+                # Save approach to file (atomic: write temp, then rename)
                 filepath = self._get_approach_path(approach.id)
+                approach_data = approach.to_dict()
+                temp_path = filepath.with_suffix('.tmp')
+                temp_path.write_bytes(json_codec.dumps(approach_data, indent=True))
+                temp_path.replace(filepath)
                 
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(approach.to_json())
-                
-                # Update manifest
-                self._update_manifest_for_save(approach)
+                # Update manifest (reuses the already serialized fields)
+                self._update_manifest_for_save(approach, approach_data)
                 
                 return True
                 
@@ -114,15 +123,57 @@ class ApproachStorage:
                 if not filepath.exists():
                     return None
                 
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    json_data = f.read()
-                
-                return ApproachPattern.from_json(json_data)
+                return ApproachPattern.from_dict(json_codec.loads(filepath.read_bytes()))
                 
             except Exception as e:
                 print(f"Error loading approach {approach_id}: {e}")
                 return None
     
+    def load_approaches(self, approach_ids: List[str]) -> Dict[str, ApproachPattern]:
+        """
+        Load many approaches at once, reading files concurrently
+        
+        Args:
+            approach_ids: IDs of approaches to load
+            
+        Returns:
+            Dict mapping approach ID to ApproachPattern (missing IDs omitted)
+        """
+        paths = {}
+        for approach_id in approach_ids:
+            try:
+                paths[approach_id] = self._get_approach_path(approach_id)
+            except ValueError as e:
+                print(f"Error loading approach {approach_id}: {e}")
+        
+        if not paths:
+            return {}
+        
+        # Per-approach files are read without the manifest lock;
+        # file I/O releases the GIL so reads overlap
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(paths))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            contents = list(executor.map(self._read_approach_file, paths.values()))
+        
+        # Parse in the calling thread
+        approaches = {}
+        for approach_id, json_data in zip(paths, contents):
+            if json_data is None:
+                continue
+            try:
+                approaches[approach_id] = ApproachPattern.from_dict(json_codec.loads(json_data))
+            except Exception as e:
+                print(f"Error loading approach {approach_id}: {e}")
+        
+        return approaches
+    
+    def _read_approach_file(self, filepath: Path) -> Optional[bytes]:
+        """Read raw approach JSON, or None if the file is missing"""
+        try:
+            return filepath.read_bytes()
+        except FileNotFoundError:
+            return None
+    
     def delete_approach(self, approach_id: str) -> bool:
         """
         Soft delete approach (mark as inactive in manifest)
@@ -182,6 +233,38 @@ class ApproachStorage:
             
             return approach_ids
     
+    def list_signatures(
+        self,
+        active_only: bool = True,
+        min_quality: float = 0.0
+    ) -> List[Tuple[str, Optional[PatternSignature]]]:
+        """
+        List approach signatures from the manifest without loading approach files
+        
+        Args:
+            active_only: Only include active approaches
+            min_quality: Minimum average quality
+            
+        Returns:
+            List of (approach_id, signature) tuples; signature is None for
+            manifest entries written before signatures were inlined
+        """
+        with self.lock:
+            signatures = []
+            
+            for entry in self.manifest['approaches']:
+                if active_only and not entry.get('active', True):
+                    continue
+                
+                if entry.get('avg_quality', 0.0) < min_quality:
+                    continue
+                
+                sig_data = entry.get('pattern_signature')
+                signature = PatternSignature.from_dict(sig_data) if sig_data else None
+                signatures.append((entry['id'], signature))
+            
+            return signatures
+    
     def get_statistics(self) -> Dict:
         """Get storage statistics"""
         with self.lock:
@@ -193,8 +276,85 @@ class ApproachStorage:
                 'manifest_size': self.manifest_path.stat().st_size if self.manifest_path.exists() else 0
             }
     
-    def _update_manifest_for_save(self, approach: ApproachPattern):
+    def get_quality_histogram(self, bins: int = 10, active_only: bool = True) -> Dict:
+        """
+        Get histogram of average quality across approaches
+        
+        Args:
+            bins: Number of equal-width bins over [0.0, 1.0]
+            active_only: Only include active approaches
+            
+        Returns:
+            Dict with 'bin_edges' and 'counts' lists
+        """
+        with self.lock:
+            qualities = self._get_quality_array(active_only)
+            edges = np.linspace(0.0, 1.0, bins + 1)
+            counts, _ = np.histogram(qualities, bins=edges)
+            
+            return {
+                'bin_edges': edges.tolist(),
+                'counts': counts.tolist()
+            }
+    
+    def top_k_by_quality(self, k: int, active_only: bool = True) -> List[str]:
+        """
+        Get IDs of the k approaches with highest average quality
+        
+        Args:
+            k: Number of approaches to return
+            active_only: Only include active approaches
+            
+        Returns:
+            List of approach IDs, sorted by quality descending
+        """
+        with self.lock:
+            self._get_quality_array(active_only)
+            indices = np.flatnonzero(self._active_mask) if active_only else np.arange(len(self._quality_ids))
+            qualities = self._quality_array[indices]
+            
+            k = min(k, len(qualities))
+            if k <= 0:
+                return []
+            
+            # Partial selection, then sort only the top k
+            if k < len(qualities):
+                top = np.argpartition(-qualities, k - 1)[:k]
+            else:
+                top = np.arange(len(qualities))
+            top = top[np.argsort(-qualities[top], kind='stable')]
+            
+            return [self._quality_ids[i] for i in indices[top]]
+    
+    def _get_quality_array(self, active_only: bool) -> np.ndarray:
+        """Get quality array, rebuilding from manifest if stale"""
+        if self._quality_array is None:
+            entries = self.manifest['approaches']
+            self._quality_ids = [e['id'] for e in entries]
+            self._quality_array = np.fromiter(
+                (e.get('avg_quality', 0.0) for e in entries),
+                dtype=np.float32,
+                count=len(entries)
+            )
+            self._active_mask = np.fromiter(
+                (e.get('active', True) for e in entries),
+                dtype=bool,
+                count=len(entries)
+            )
+        
+        if active_only:
+            return self._quality_array[self._active_mask]
+        return self._quality_array
+    
+    def _update_manifest_for_save(
+        self,
+        approach: ApproachPattern,
+        approach_data: Optional[Dict] = None
+    ):
         """Update manifest when saving an approach"""
+        if approach_data is None:
+            approach_data = approach.to_dict()
+        
         # Find existing entry
         existing_idx = None
         for idx, entry in enumerate(self.manifest['approaches']):
@@ -210,7 +370,8 @@ class ApproachStorage:
             'active': approach.active,
             'usage_count': approach.performance_metrics.usage_count,
             'avg_quality': approach.performance_metrics.avg_quality,
-            'last_updated': approach.last_updated.isoformat()
+            'last_updated': approach_data['last_updated'],
+            'pattern_signature': approach_data['pattern_signature']
         }
         
         if existing_idx is not None:
@@ -221,6 +382,8 @@ class ApproachStorage:
             self.manifest['approaches'].append(entry)
             self.manifest['total_approaches'] += 1
         
+        self._quality_array = None  # Manifest changed, invalidate index
+        
         # Update counts
         active_count = sum(1 for e in self.manifest['approaches'] if e.get('active', True))
         self.manifest['active_approaches'] = active_count
@@ -288,8 +451,7 @@ if __name__ == "__main__":
             failure_count=0,
             success_rate=1.0,
             vs_alternatives={},
-            recent_quality_trend="stable",
-            quality_history=[]
+            recent_quality_trend="stable"
         ),
         generation=0,
         tags=["test", "demo"]
@@ -322,8 +484,13 @@ if __name__ == "__main__":
     for key, value in stats.items():
         print(f"   {key}: {value}")
     
+    # Test quality aggregates
+    print("\n5. Quality Aggregates:")
+    print(f"   Top approaches: {storage.top_k_by_quality(3)}")
+    print(f"   Histogram counts: {storage.get_quality_histogram()['counts']}")
+    
     # Test soft delete
-    print("\n5. Soft Delete:")
+    print("\n6. Soft Delete:")
     success = storage.delete_approach(approach.id)
     print(f"   Delete successful: {success}")
     
@@ -9,6 +9,26 @@ from dataclasses import dataclass, asdict
 from src.approach_patterns import ContentFeatures
 
 
+# Content shorter than this takes the single-pass fast path
+SMALL_CONTENT_LENGTH = 64
+
+# Step markers that identify sequential (numbered) structure
+_STEP_PATTERN = re.compile(
+    r'step\s+\d+|first.*second.*third|^\d+\.\s+(?:first|then|next|finally)',
+    re.IGNORECASE
+)
+_BULLET_LINE_PATTERN = re.compile(r'^[\*\-\+]\s+', re.MULTILINE)
+
+# Example markers followed by up to 500 characters of example text
+_EXAMPLE_PATTERN = re.compile(
+    r'(?:for example|for instance|example|e\.g\.):[\s\S]{0,500}',
+    re.IGNORECASE
+)
+
+# Word tokens, keeping contractions like "let's" as a single token
+_WORD_PATTERN = re.compile(r"\w+(?:'\w+)*")
+
+
 class ContentAnalyzer:
     """
     Analyzes generated content to extract structural and stylistic features
@@ -43,6 +63,14 @@ class ContentAnalyzer:
         if not content:
             return self._empty_features()
         
+        # Lower-case and tokenize once, shared by all tone/formality scans
+        content_lower = content.lower()
+        tokens = set(_WORD_PATTERN.findall(content_lower))
+        
+        # Fast path: tiny content without code skips the regex pipeline
+        if len(content) < SMALL_CONTENT_LENGTH and '`' not in content:
+            return self._analyze_small(content, content_lower, tokens)
+        
         # Structure analysis
         section_count = self._count_sections(content)
         has_code_blocks = self._has_code_blocks(content)
@@ -56,14 +84,19 @@ class ContentAnalyzer:
         avg_section_length = self._calculate_avg_section_length(content, section_count)
         
         # Style analysis
-        detected_tone = self._detect_tone(content)
-        formality_score = self._calculate_formality(content)
+        detected_tone = self._detect_tone(content, content_lower, tokens)
+        formality_score = self._calculate_formality(content, content_lower, tokens)
         
         # Content ratios
         explanation_ratio = self._calculate_explanation_ratio(content)
         example_ratio = self._calculate_example_ratio(content)
         code_ratio = self._calculate_code_ratio(content)
         
+        # Structure type (reuses the structure tallies above)
+        structure_type = self._classify_structure(
+            content, has_numbered_list, has_bullets, section_count
+        )
+        
         return ContentFeatures(
             section_count=section_count,
             has_code_blocks=has_code_blocks,
@@ -77,7 +110,64 @@ class ContentAnalyzer:
             formality_score=formality_score,
             explanation_ratio=explanation_ratio,
             example_ratio=example_ratio,
-            code_ratio=code_ratio
+            code_ratio=code_ratio,
+            structure_type=structure_type
+        )
+    
+    def _analyze_small(self, content: str, content_lower: str, tokens: set) -> ContentFeatures:
+        """
+        Analyze short content (no code) with a single line-prefix pass
+        Produces the same structure tallies as the regex pipeline for
+        well-formed markdown
+        """
+        section_count = 0
+        has_numbered_list = False
+        has_bullets = False
+        pipe_lines = 0
+        explanation_lines = []
+        
+        for line in content.split('\n'):
+            if line.count('|') >= 2 and line.rindex('|') - line.index('|') > 1:
+                pipe_lines += 1
+            
+            parts = line.split(None, 1)
+            if len(parts) < 2 or line[0].isspace():
+                explanation_lines.append(line)
+                continue
+            
+            marker = parts[0]
+            if len(marker) <= 6 and marker == '#' * len(marker):
+                section_count += 1
+            elif marker in ('*', '-', '+'):
+                has_bullets = True
+            elif marker[-1] == '.' and marker[:-1].isdigit():
+                has_numbered_list = True
+                explanation_lines.append('')  # List items are not explanatory text
+                continue
+            
+            explanation_lines.append(line)
+        
+        section_count = max(1, section_count)
+        total_length = len(content)
+        explanation_length = len('\n'.join(explanation_lines).strip())
+        
+        return ContentFeatures(
+            section_count=section_count,
+            has_code_blocks=False,
+            code_block_count=0,
+            has_numbered_list=has_numbered_list,
+            has_bullets=has_bullets,
+            has_tables=pipe_lines >= 2,
+            total_length=total_length,
+            avg_section_length=total_length // section_count,
+            detected_tone=self._detect_tone(content, content_lower, tokens),
+            formality_score=self._calculate_formality(content, content_lower, tokens),
+            explanation_ratio=min(1.0, explanation_length / total_length),
+            example_ratio=self._calculate_example_ratio(content) if ':' in content else 0.0,
+            code_ratio=0.0,
+            structure_type=self._classify_structure(
+                content, has_numbered_list, has_bullets, section_count
+            )
         )
     
     def _empty_features(self) -> ContentFeatures:
@@ -95,7 +185,8 @@ class ContentAnalyzer:
             formality_score=0.5,
             explanation_ratio=0.0,
             example_ratio=0.0,
-            code_ratio=0.0
+            code_ratio=0.0,
+            structure_type="prose"
         )
     
     def _count_sections(self, content: str) -> int:
@@ -140,17 +231,35 @@ class ContentAnalyzer:
             return 0
         return len(content) // section_count
     
-    def _detect_tone(self, content: str) -> str:
+    def _count_indicators(self, indicators: List[str], content_lower: str, tokens: set) -> int:
+        """
+        Count how many indicators appear in content
+        Single words are matched as whole tokens; multi-word phrases by substring
+        """
+        return sum(
+            1 for word in indicators
+            if (word in content_lower if ' ' in word else word in tokens)
+        )
+    
+    def _detect_tone(
+        self,
+        content: str,
+        content_lower: Optional[str] = None,
+        tokens: Optional[set] = None
+    ) -> str:
         """
         Detect overall tone of content
         Returns: "formal", "casual", "technical", or "educational"
         """
-        content_lower = content.lower()
+        if content_lower is None:
+            content_lower = content.lower()
+        if tokens is None:
+            tokens = set(_WORD_PATTERN.findall(content_lower))
         
         # Count indicators
-        formal_count = sum(1 for word in self.formal_indicators if word in content_lower)
-        casual_count = sum(1 for word in self.casual_indicators if word in content_lower)
-        technical_count = sum(1 for word in self.technical_indicators if word in content_lower)
+        formal_count = self._count_indicators(self.formal_indicators, content_lower, tokens)
+        casual_count = self._count_indicators(self.casual_indicators, content_lower, tokens)
+        technical_count = self._count_indicators(self.technical_indicators, content_lower, tokens)
         
         # Educational indicators
         educational_patterns = [
@@ -172,15 +281,23 @@ class ContentAnalyzer:
         
         return max(scores, key=scores.get)
     
-    def _calculate_formality(self, content: str) -> float:
+    def _calculate_formality(
+        self,
+        content: str,
+        content_lower: Optional[str] = None,
+        tokens: Optional[set] = None
+    ) -> float:
         """
         Calculate formality score (0.0 = casual, 1.0 = formal)
         """
-        content_lower = content.lower()
+        if content_lower is None:
+            content_lower = content.lower()
+        if tokens is None:
+            tokens = set(_WORD_PATTERN.findall(content_lower))
         
         # Count formal vs casual indicators
-        formal_count = sum(1 for word in self.formal_indicators if word in content_lower)
-        casual_count = sum(1 for word in self.casual_indicators if word in content_lower)
+        formal_count = self._count_indicators(self.formal_indicators, content_lower, tokens)
+        casual_count = self._count_indicators(self.casual_indicators, content_lower, tokens)
         
         # Additional signals
         contractions = len(re.findall(r"\w+'\w+", content))  # can't, don't, etc.
@@ -225,20 +342,8 @@ class ContentAnalyzer:
         Calculate ratio of example content
         (text near "example", "for instance", etc.)
         """
-        # Find example sections
-        example_patterns = [
-            r'for example:[\s\S]{0,500}',
-            r'example:[\s\S]{0,500}',
-            r'for instance:[\s\S]{0,500}',
-            r'e\.g\.:[\s\S]{0,500}'
-        ]
-        
-        example_text = ""
-        for pattern in example_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            example_text += " ".join(matches)
-        
-        example_length = len(example_text)
+        # Sum lengths of example windows directly from match offsets
+        example_length = sum(m.end() - m.start() for m in _EXAMPLE_PATTERN.finditer(content))
         total_length = len(content)
         
         if total_length == 0:
@@ -270,23 +375,27 @@ class ContentAnalyzer:
         """
         Determine structure type of content
         Returns: "sequential_steps", "hierarchical", "prose", "bulleted"
-        """
-        has_numbered = self._has_numbered_list(content)
-        has_bullets = self._has_bullets(content)
-        section_count = self._count_sections(content)
         
+        Prefer reading ContentFeatures.structure_type when analyze_content
+        has already been run on the same content.
+        """
+        return self.analyze_content(content).structure_type
+    
+    def _classify_structure(
+        self,
+        content: str,
+        has_numbered: bool,
+        has_bullets: bool,
+        section_count: int
+    ) -> str:
+        """Classify structure type from already-extracted structure tallies"""
         # Sequential steps (numbered lists)
-        if has_numbered:
-            step_patterns = [
-                r'step\s+\d+', r'first.*second.*third',
-                r'^\d+\.\s+(first|then|next|finally)'
-            ]
-            if any(re.search(pattern, content, re.IGNORECASE) for pattern in step_patterns):
-                return "sequential_steps"
+        if has_numbered and _STEP_PATTERN.search(content):
+            return "sequential_steps"
         
         # Bulleted (many bullet points)
         if has_bullets:
-            bullet_lines = len(re.findall(r'^[\*\-\+]\s+', content, re.MULTILINE))
+            bullet_lines = len(_BULLET_LINE_PATTERN.findall(content))
             if bullet_lines >= 5:
                 return "bulleted"
         
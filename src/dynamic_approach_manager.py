@@ -3,14 +3,29 @@ Dynamic Approach Manager
 Central management of dynamic approach lifecycle
 """
 
+import weakref
 from typing import List, Optional, Tuple, Dict
 from datetime import datetime
+from collections import OrderedDict
 from src.approach_patterns import ApproachPattern, TaskContext, PatternSignature, StyleCharacteristics, PerformanceMetrics
 from src.approach_storage import ApproachStorage
-from src.approach_matching import match_approaches as match_approaches_func
+from src.approach_matching import SignatureIndex
 from src.input_sanitization import sanitize_identifier
 
 
+def _save_pending(storage: ApproachStorage, dirty: Dict[str, ApproachPattern]) -> bool:
+    """Save and clear approaches with pending metrics (also run at exit or on collection)"""
+    pending = list(dirty.values())
+    dirty.clear()
+    
+    all_saved = True
+    for approach in pending:
+        if not storage.save_approach(approach):
+            all_saved = False
+    
+    return all_saved
+
+
 class DynamicApproachManager:
     """
     Manages dynamic approach lifecycle:
@@ -20,9 +35,30 @@ class DynamicApproachManager:
     - Evolution and pruning (future)
     """
     
-    def __init__(self, storage_path: str = "data/approaches"):
+    def __init__(
+        self,
+        storage_path: str = "data/approaches",
+        cache_size: int = 512,
+        metrics_flush_threshold: int = 20,
+        match_cache_size: int = 1024
+    ):
         self.storage = ApproachStorage(storage_path)
-        self._approach_cache = {}  # Simple in-memory cache
+        self._approach_cache = OrderedDict()  # LRU cache (most recent last)
+        self._cache_max = cache_size
+        self._signature_index = None  # Vectorized matcher, rebuilt lazily
+        
+        # Ranked matches per task signature (LRU), valid for the current index
+        self._match_cache = OrderedDict()
+        self._match_cache_max = match_cache_size
+        
+        # Write-back of execution metrics: approach_id -> approach with unsaved metrics
+        self._dirty_approaches: Dict[str, ApproachPattern] = {}
+        self._pending_metric_updates = 0
+        self._metrics_flush_threshold = metrics_flush_threshold
+        
+        # Pending metrics are saved at exit, or when an unclosed manager is
+        # collected, without the exit hook keeping the manager alive
+        self._finalizer = weakref.finalize(self, _save_pending, self.storage, self._dirty_approaches)
     
     # === CRUD Operations ===
     
@@ -49,7 +85,8 @@ class DynamicApproachManager:
         
         if success:
             # Add to cache
-            self._approach_cache[approach.id] = approach
+            self._cache_put(approach.id, approach)
+            self._invalidate_matching()
         
         return success
     
@@ -63,41 +100,70 @@ class DynamicApproachManager:
         Returns:
             ApproachPattern if found, None otherwise
         """
-        # Sanitize ID
-        approach_id = sanitize_identifier(approach_id)
+        return self._get_approach_unchecked(sanitize_identifier(approach_id))
+    
+    def _get_approach_unchecked(self, approach_id: str) -> Optional[ApproachPattern]:
+        """
+        Get approach by an ID that is already known to be safe
         
-        # Check cache first
-        if approach_id in self._approach_cache:
-            return self._approach_cache[approach_id]
+        For internal lookups of IDs taken from the storage manifest.
+        
+        Args:
+            approach_id: Sanitized approach identifier
+            
+        Returns:
+            ApproachPattern if found, None otherwise
+        """
+        # Pending metrics are newer than anything cached or stored
+        approach = self._dirty_approaches.get(approach_id)
+        if approach is not None:
+            self._cache_put(approach_id, approach)
+            return approach
+        
+        # Check cache next
+        approach = self._approach_cache.get(approach_id)
+        if approach is not None:
+            self._approach_cache.move_to_end(approach_id)
+            return approach
         
         # Load from storage
         approach = self.storage.load_approach(approach_id)
         
         if approach:
             # Cache for next time
-            self._approach_cache[approach_id] = approach
+            self._cache_put(approach_id, approach)
         
         return approach
     
-    def update_approach(self, approach: ApproachPattern) -> bool:
+    def update_approach(self, approach: ApproachPattern, now: Optional[datetime] = None) -> bool:
         """
         Update existing approach
         
         Args:
             approach: Updated approach
+            now: Update time (defaults to current time)
             
         Returns:
             True if successful
         """
         # Update timestamp
-        approach.last_updated = datetime.now()
+        approach.last_updated = now or datetime.now()
         
         # Save
         success = self.storage.save_approach(approach)
         
         if success:
-            # Update cache
-            self._approach_cache[approach.id] = approach
+            # Update cache (saved state includes any pending metrics)
+            self._cache_put(approach.id, approach)
+            self._dirty_approaches.pop(approach.id, None)
+            
+            # Metric-only updates keep the signature index valid
+            index = self._signature_index
+            if index is not None and (
+                not approach.active or
+                index.signatures.get(approach.id) != approach.pattern_signature
+            ):
+                self._invalidate_matching()
         
         return success
     
@@ -111,12 +177,17 @@ class DynamicApproachManager:
         Returns:
             True if successful
         """
+        # Persist pending metrics first; delete reloads the approach from disk
+        pending = self._dirty_approaches.pop(approach_id, None)
+        if pending is not None:
+            self.storage.save_approach(pending)
+        
         success = self.storage.delete_approach(approach_id)
         
         if success:
             # Remove from cache
-            if approach_id in self._approach_cache:
-                del self._approach_cache[approach_id]
+            self._approach_cache.pop(approach_id, None)
+            self._invalidate_matching()
         
         return success
     
@@ -137,12 +208,27 @@ class DynamicApproachManager:
         """
         approach_ids = self.storage.list_approaches(active_only, min_quality)
         
+        # Bulk load everything not already in memory in one pass
+        missing = [
+            aid for aid in approach_ids
+            if aid not in self._approach_cache and aid not in self._dirty_approaches
+        ]
+        loaded = self.storage.load_approaches(missing) if missing else {}
+        
         approaches = []
         for aid in approach_ids:
-            approach = self.get_approach(aid)
+            approach = (
+                self._dirty_approaches.get(aid) or
+                self._approach_cache.get(aid) or
+                loaded.get(aid)
+            )
             if approach:
                 approaches.append(approach)
         
+        # Populate cache (LRU bound applies)
+        for aid, approach in loaded.items():
+            self._cache_put(aid, approach)
+        
         return approaches
     
     # === Matching Operations ===
@@ -164,14 +250,63 @@ class DynamicApproachManager:
         Returns:
             List of (approach, match_score) tuples, sorted by score
         """
-        # Get all active approaches
-        active_approaches = self.list_approaches(active_only=True)
-        
-        # Match using algorithm
-        matches = match_approaches_func(task_context, active_approaches, threshold, limit)
+        # Score signatures from the manifest; only winners are fully loaded.
+        # Repeated task signatures reuse the ranking until approaches change.
+        key = self._match_key(task_context, threshold)
+        ranked = self._match_cache.get(key)
+        if ranked is None:
+            ranked = self._get_signature_index().match(task_context, threshold, limit=None)
+            self._match_cache[key] = ranked
+            while len(self._match_cache) > self._match_cache_max:
+                self._match_cache.popitem(last=False)
+        else:
+            self._match_cache.move_to_end(key)
+        
+        # Materialize full approaches for the top matches
+        matches = []
+        for aid, score in ranked:
+            approach = self._get_approach_unchecked(aid)
+            if approach and approach.active:
+                matches.append((approach, score))
+                if len(matches) >= limit:
+                    break
         
         return matches
     
+    @staticmethod
+    def _match_key(task_context: TaskContext, threshold: float) -> tuple:
+        """Hashable key covering every task field that affects match scores"""
+        return (
+            frozenset(task_context.domain_weights.items()),
+            task_context.complexity,
+            frozenset(kw.lower() for kw in task_context.keywords),
+            task_context.output_type,
+            threshold
+        )
+    
+    def _invalidate_matching(self):
+        """Drop the signature index and cached rankings after approaches change"""
+        self._signature_index = None
+        self._match_cache.clear()
+    
+    def _get_signature_index(self) -> SignatureIndex:
+        """Get vectorized signature index over active approaches, building if stale"""
+        if self._signature_index is None:
+            candidates = []
+            for aid, signature in self.storage.list_signatures(active_only=True):
+                if signature is None:
+                    # Older manifest entry without an inlined signature
+                    approach = self._get_approach_unchecked(aid)
+                    if not approach or not approach.active:
+                        continue
+                    # Copy so in-place edits to the approach are detected as changes
+                    signature = PatternSignature.from_dict(approach.pattern_signature.to_dict())
+                candidates.append((aid, signature))
+            
+            self._signature_index = SignatureIndex(candidates)
+        
+        return self._signature_index
+    
     def get_best_match(self, task_context: TaskContext) -> Optional[Tuple[ApproachPattern, float]]:
         """
         Get single best matching approach
@@ -199,6 +334,10 @@ class DynamicApproachManager:
         """
         Record an execution result for an approach
         
+        Metrics are updated in memory and written to storage in batches
+        (every metrics_flush_threshold executions, on flush_metrics(), or
+        at exit). Manifest quality figures lag until the next flush.
+        
         Args:
             approach_id: Approach that was used
             quality: Execution quality (0.0-1.0)
@@ -212,12 +351,39 @@ class DynamicApproachManager:
         if not approach:
             return False
         
-        # Update metrics
-        approach.performance_metrics.update_with_execution(quality, success)
-        approach.last_updated = datetime.now()
+        # Update metrics (one timestamp for the whole update)
+        now = datetime.now()
+        approach.performance_metrics.update_with_execution(quality, success, now)
+        approach.last_updated = now
         
-        # Save updated approach
-        return self.update_approach(approach)
+        # Defer the save (write-back)
+        self._dirty_approaches[approach.id] = approach
+        self._pending_metric_updates += 1
+        
+        if self._pending_metric_updates >= self._metrics_flush_threshold:
+            return self.flush_metrics()
+        
+        return True
+    
+    def flush_metrics(self) -> bool:
+        """
+        Save approaches with pending execution metrics
+        
+        Returns:
+            True if all pending approaches were saved
+        """
+        self._pending_metric_updates = 0
+        return _save_pending(self.storage, self._dirty_approaches)
+    
+    def close(self) -> bool:
+        """
+        Save pending execution metrics and release the exit hook
+        
+        Returns:
+            True if all pending approaches were saved
+        """
+        self._finalizer.detach()
+        return self.flush_metrics()
     
     # === Statistics ===
     
@@ -227,15 +393,20 @@ class DynamicApproachManager:
         
         approaches = self.list_approaches(active_only=False)
         
-        # Calculate aggregate stats
-        total_quality = sum(a.performance_metrics.avg_quality for a in approaches if a.performance_metrics.usage_count > 0)
-        approaches_with_usage = [a for a in approaches if a.performance_metrics.usage_count > 0]
+        # Calculate aggregate stats in a single pass
+        total_quality = 0.0
+        used_count = 0
+        for a in approaches:
+            metrics = a.performance_metrics
+            if metrics.usage_count > 0:
+                total_quality += metrics.avg_quality
+                used_count += 1
         
         return {
             **storage_stats,
             'cached_approaches': len(self._approach_cache),
-            'avg_quality': total_quality / len(approaches_with_usage) if approaches_with_usage else 0.0,
-            'approaches_with_usage': len(approaches_with_usage)
+            'avg_quality': total_quality / used_count if used_count else 0.0,
+            'approaches_with_usage': used_count
         }
     
     def get_approach_performance(
@@ -296,9 +467,19 @@ class DynamicApproachManager:
         evolution = ApproachEvolution(manager=self)
         return evolution.create_approach_from_cluster(cluster, signature, style)
     
+    def _cache_put(self, approach_id: str, approach: ApproachPattern):
+        """Insert approach as most recently used, evicting the least recently used"""
+        self._approach_cache[approach_id] = approach
+        self._approach_cache.move_to_end(approach_id)
+        
+        while len(self._approach_cache) > self._cache_max:
+            self._approach_cache.popitem(last=False)
+    
     def clear_cache(self):
-        """Clear the approach cache"""
+        """Clear the approach cache (pending metrics are saved first)"""
+        self.flush_metrics()
         self._approach_cache.clear()
+        self._invalidate_matching()
     
     def reload_from_storage(self):
         """Reload all approaches from storage (clears cache)"""
@@ -362,8 +543,7 @@ if __name__ == "__main__":
             failure_count=0,
             success_rate=0.0,
             vs_alternatives={},
-            recent_quality_trend="new",
-            quality_history=[]
+            recent_quality_trend="new"
         ),
         generation=0,
         tags=["demo", "tutorial"]
@@ -3,15 +3,46 @@ Execution History Management
 Tracks execution records for pattern analysis
 """
 
-import json
+import os
+import gzip
+import mmap
+import shutil
+import atexit
+import sqlite3
+import weakref
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional, Dict, Tuple
-from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Dict, Tuple
+from datetime import datetime, date, timedelta
 from dataclasses import dataclass, asdict
 from src.approach_patterns import ExecutionRecord, TaskContext, ContentFeatures
+from src import json_codec
 from src.input_sanitization import sanitize_identifier
 
+# Suffix added to daily files archived by compact_old_records
+ARCHIVE_SUFFIX = '.gz'
+
+# Daily files at least this large are read through mmap
+MMAP_MIN_SIZE = 1024 * 1024
+
+# Daily files read ahead concurrently by get_records
+SCAN_WORKERS = 4
+
+# Open histories, closed at exit (held weakly, so the hook keeps none alive)
+_open_histories = weakref.WeakSet()
+
+
+def _close_open_histories():
+    """Release the handles of histories still open at exit"""
+    for history in list(_open_histories):
+        history.close()
+
+
+atexit.register(_close_open_histories)
+
 
 class ExecutionHistory:
     """
@@ -27,40 +58,141 @@ class ExecutionHistory:
         self.current_date = None
         self.current_file = None
         
-        # Create index file if needed
-        self.index_path = self.history_path / "index.json"
-        self.index = self._load_or_create_index()
+        # SQLite index: one row per record, queried by date/approach/quality
+        self.index_path = self.history_path / "index.db"
+        self._db = None
+        self._index_stale = False  # A record reached disk but not the index
+        self._open_index()
+        
+        # Release the daily file handle and index on exit
+        _open_histories.add(self)
     
-    def _load_or_create_index(self) -> Dict:
-        """Load or create index file"""
-        if self.index_path.exists():
-            try:
-                with open(self.index_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading index: {e}, creating new")
-        
-        index = {
-            "version": "1.0",
-            "created_at": datetime.now().isoformat(),
-            "total_records": 0,
-            "date_ranges": {},  # {"2025-10": {"min": "2025-10-01", "max": "2025-10-31", "count": 150}}
-            "files": []  # List of JSONL files
+    def __enter__(self) -> 'ExecutionHistory':
+        """Use as a context manager that closes the history on exit"""
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Release the daily file handle and index"""
+        self.close()
+    
+    def _open_index(self) -> sqlite3.Connection:
+        """Open the index database, bringing it up to date with the daily files"""
+        if self._db is not None:
+            if self._index_stale:
+                self._reconcile_index()
+            return self._db
+        
+        db = sqlite3.connect(str(self.index_path), isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "record_id TEXT, approach_id TEXT, day TEXT, quality REAL, file TEXT)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_records_day ON records (day)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_records_approach ON records (approach_id, day)")
+        
+        # Size and mtime of each daily file as of its last indexed record
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "file TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER)"
+        )
+        
+        self._db = db
+        
+        # Pick up records the index missed: history written before the index
+        # existed, an interrupted write, or daily files copied in
+        self._reconcile_index()
+        
+        return db
+    
+    def rebuild_index(self):
+        """Discard the index and rebuild it by scanning every daily file"""
+        with self.lock:
+            self._open_index()
+            self._reconcile_index(full=True)
+    
+    def _reconcile_index(self, full: bool = False):
+        """
+        Reindex daily files whose size or mtime changed since they were indexed
+        
+        Args:
+            full: Reindex every daily file
+        """
+        db = self._db
+        indexed = {} if full else {
+            file: (size, mtime_ns)
+            for file, size, mtime_ns in db.execute("SELECT file, size, mtime_ns FROM files")
         }
         
-        self._save_index(index)
-        return index
+        present = set()
+        stale = []
+        for filepath in self._list_daily_files(date.min, date.max):
+            filename = self._daily_file_name(filepath)
+            present.add(filename)
+            stat = filepath.stat()
+            state = (stat.st_size, stat.st_mtime_ns)
+            if indexed.get(filename) != state:
+                stale.append((filepath, filename, state))
+        
+        # Rows of deleted files, or of an index from before file states were tracked
+        orphaned = full or any(filename not in present for filename in indexed) or (
+            not indexed and db.execute("SELECT 1 FROM records LIMIT 1").fetchone() is not None
+        )
+        
+        if stale or orphaned:
+            db.execute("BEGIN")
+            try:
+                if full:
+                    db.execute("DELETE FROM records")
+                    db.execute("DELETE FROM files")
+                
+                for filepath, filename, (size, mtime_ns) in stale:
+                    day = self._daily_file_date(filename).isoformat()
+                    db.execute("DELETE FROM records WHERE file = ?", (filename,))
+                    db.executemany(
+                        "INSERT INTO records VALUES (?, ?, ?, ?, ?)",
+                        [(record.record_id, record.approach_id, day, record.actual_quality, filename)
+                         for record in self._read_jsonl_file(filepath)]
+                    )
+                    db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (filename, size, mtime_ns))
+                
+                db.executemany(
+                    "DELETE FROM files WHERE file = ?",
+                    [(filename,) for filename in indexed if filename not in present]
+                )
+                db.execute("DELETE FROM records WHERE file NOT IN (SELECT file FROM files)")
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        
+        self._index_stale = False
     
-    def _save_index(self, index: Dict):
-        """Save index to file"""
-        with open(self.index_path, 'w', encoding='utf-8') as f:
-            json.dump(index, f, indent=2)
+    def _index_record(self, record: ExecutionRecord, day: date, filepath: Path, stat: os.stat_result):
+        """Add a record that is already on disk to the index"""
+        db = self._open_index()
+        db.execute("BEGIN")
+        try:
+            db.execute(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?)",
+                (record.record_id, record.approach_id, day.isoformat(),
+                 record.actual_quality, filepath.name)
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                (filepath.name, stat.st_size, stat.st_mtime_ns)
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
     
     def _get_daily_file_path(self, date: datetime) -> Path:
         """Get file path for a specific date"""
         year_month = date.strftime("%Y-%m")
         month_dir = self.history_path / year_month
-        month_dir.mkdir(parents=True, exist_ok=True)
         
         filename = f"records_{date.strftime('%Y%m%d')}.jsonl"
         return month_dir / filename
@@ -73,50 +205,61 @@ class ExecutionHistory:
             record: ExecutionRecord to store
             
         Returns:
-            True if successful
+            True if the record was written (indexing failures are repaired
+            on the next query)
         """
         with self.lock:
             try:
-                # Get file for today
+                # Get file for today (handle is kept open until the date rolls over)
                 today = datetime.now()
                 filepath = self._get_daily_file_path(today)
+                f = self._get_append_handle(today.date(), filepath)
                 
                 # Append record (JSONL format: one JSON per line)
-                with open(filepath, 'a', encoding='utf-8') as f:
-                    json_line = json.dumps(record.to_dict())
-                    f.write(json_line + '\n')
-                
-                # Update index
-                self._update_index_for_record(record, filepath.name, today)
-                
-                return True
+                f.write(json_codec.dumps(record.to_dict()) + b'\n')
                 
+                # The index must never list a record that is not on disk
+                f.flush()
             except Exception as e:
                 print(f"Error recording execution: {e}")
                 return False
+            
+            try:
+                if self._index_stale:
+                    # Reconciling reindexes this record's file, record included
+                    self._open_index()
+                else:
+                    self._index_record(record, today.date(), filepath, os.fstat(f.fileno()))
+            except Exception as e:
+                print(f"Error indexing execution: {e}")
+                self._index_stale = True
+            
+            return True
     
-    def _update_index_for_record(self, record: ExecutionRecord, filename: str, date: datetime):
-        """Update index after adding record"""
-        self.index['total_records'] += 1
-        
-        # Update date range
-        year_month = date.strftime("%Y-%m")
-        if year_month not in self.index['date_ranges']:
-            self.index['date_ranges'][year_month] = {
-                'min': date.date().isoformat(),
-                'max': date.date().isoformat(),
-                'count': 0
-            }
-        
-        date_range = self.index['date_ranges'][year_month]
-        date_range['count'] += 1
-        date_range['max'] = max(date_range['max'], date.date().isoformat())
+    def _get_append_handle(self, day, filepath: Path):
+        """Get open append handle for the daily file, rotating on date change"""
+        if self.current_date != day or self.current_file is None:
+            if self.current_file is not None:
+                self.current_file.close()
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            self.current_file = open(filepath, 'ab')
+            self.current_date = day
         
-        # Track files
-        if filename not in self.index['files']:
-            self.index['files'].append(filename)
+        return self.current_file
+    
+    def close(self):
+        """Release the daily file handle and index"""
+        _open_histories.discard(self)
         
-        self._save_index(self.index)
+        with self.lock:
+            if self.current_file is not None:
+                self.current_file.close()
+                self.current_file = None
+                self.current_date = None
+            
+            if self._db is not None:
+                self._db.close()
+                self._db = None
     
     def get_records(
         self,
@@ -143,62 +286,161 @@ class ExecutionHistory:
             records = []
             
             # Determine date range to scan
+            now = datetime.now()
             if start_date is None:
-                start_date = datetime.now() - timedelta(days=365)  # Last year
+                start_date = now - timedelta(days=365)  # Last year
             if end_date is None:
-                end_date = datetime.now()
+                end_date = now
             
-            # Iterate through dates
-            current = start_date.date()
-            end = end_date.date()
+            # Ask the index which daily files hold matching records
+            query = "SELECT DISTINCT file FROM records WHERE day BETWEEN ? AND ?"
+            params = [start_date.date().isoformat(), end_date.date().isoformat()]
+            if approach_id is not None:
+                query += " AND approach_id = ?"
+                params.append(approach_id)
+            if min_quality is not None:
+                query += " AND quality >= ?"
+                params.append(min_quality)
             
-            while current <= end:
-                filepath = self._get_daily_file_path(datetime.combine(current, datetime.min.time()))
-                
-                if filepath.exists():
-                    # Read JSONL file
-                    daily_records = self._read_jsonl_file(filepath)
+            matching_files = {row[0] for row in self._open_index().execute(query, params)}
+            
+            # Iterate through those daily files in range (oldest first)
+            daily_files = [
+                fp for fp in self._list_daily_files(start_date.date(), end_date.date())
+                if self._daily_file_name(fp) in matching_files
+            ]
+            
+            for daily_records in self._read_files_in_order(daily_files):
+                # Apply filters
+                for record in daily_records:
+                    # Quality filter
+                    if min_quality is not None and record.actual_quality < min_quality:
+                        continue
                     
-                    # Apply filters
-                    for record in daily_records:
-                        # Quality filter
-                        if min_quality is not None and record.actual_quality < min_quality:
-                            continue
-                        
-                        # Approach filter
-                        if approach_id is not None and record.approach_id != approach_id:
-                            continue
-                        
-                        records.append(record)
-                        
-                        # Limit check
-                        if limit is not None and len(records) >= limit:
-                            return records
-                
-                # Next day
-                current += timedelta(days=1)
+                    # Approach filter
+                    if approach_id is not None and record.approach_id != approach_id:
+                        continue
+                    
+                    records.append(record)
+                    
+                    # Limit check
+                    if limit is not None and len(records) >= limit:
+                        return records
             
             return records
     
+    def _list_daily_files(self, start: date, end: date) -> List[Path]:
+        """List daily JSONL files (plain or archived) whose date falls in [start, end], sorted by date"""
+        dated_files = {}  # index filename -> (date, path)
+        
+        for filepath in self.history_path.glob('*/records_*.jsonl*'):
+            filename = self._daily_file_name(filepath)
+            file_date = self._daily_file_date(filename)
+            if file_date is None:
+                continue  # Temporary or unrelated file
+            
+            if start <= file_date <= end:
+                # An interrupted compaction can leave both copies; the plain file wins
+                if filename in dated_files and filepath.name != filename:
+                    continue
+                dated_files[filename] = (file_date, filepath)
+        
+        return [filepath for _, filepath in sorted(dated_files.values())]
+    
+    def _read_files_in_order(self, filepaths: List[Path]) -> Iterator[List[ExecutionRecord]]:
+        """
+        Read daily files on a small thread pool, yielding results in input order
+        
+        At most SCAN_WORKERS files are in flight, so a caller that stops
+        early (e.g. on a record limit) does not pay for the remaining files.
+        """
+        if len(filepaths) <= 1:
+            for filepath in filepaths:
+                yield self._read_jsonl_file(filepath)
+            return
+        
+        remaining = iter(filepaths)
+        max_workers = min(SCAN_WORKERS, len(filepaths))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque(
+                executor.submit(self._read_jsonl_file, filepath)
+                for filepath in islice(remaining, max_workers)
+            )
+            try:
+                while pending:
+                    daily_records = pending.popleft().result()
+                    
+                    # Keep the window full while the caller consumes
+                    filepath = next(remaining, None)
+                    if filepath is not None:
+                        pending.append(executor.submit(self._read_jsonl_file, filepath))
+                    
+                    yield daily_records
+            finally:
+                for future in pending:
+                    future.cancel()
+    
+    @staticmethod
+    def _daily_file_date(filename: str) -> Optional[date]:
+        """Date of a daily file from its index name, or None if not a daily file"""
+        if not filename.endswith('.jsonl'):
+            return None
+        try:
+            return datetime.strptime(filename[len('records_'):-len('.jsonl')], '%Y%m%d').date()
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _daily_file_name(filepath: Path) -> str:
+        """Index name of a daily file (archived files keep their original name)"""
+        name = filepath.name
+        if name.endswith(ARCHIVE_SUFFIX):
+            name = name[:-len(ARCHIVE_SUFFIX)]
+        return name
+    
     def _read_jsonl_file(self, filepath: Path) -> List[ExecutionRecord]:
-        """Read all records from a JSONL file"""
+        """Read all records from a JSONL file (gzip-archived files are decompressed)"""
         records = []
         
+        # Bound once: this loop runs for every stored record
+        loads = json_codec.loads
+        from_dict = ExecutionRecord.from_dict
+        append = records.append
+        
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    data = json.loads(line)
-                    record = ExecutionRecord.from_dict(data)
-                    records.append(record)
+            for line in self._iter_jsonl_lines(filepath):
+                if not line.strip():
+                    continue
+                
+                append(from_dict(loads(line)))
         except Exception as e:
             print(f"Error reading {filepath}: {e}")
         
         return records
     
+    def _iter_jsonl_lines(self, filepath: Path) -> Iterator[bytes]:
+        """Yield raw lines of a daily file"""
+        if filepath.name.endswith(ARCHIVE_SUFFIX):
+            yield from gzip.decompress(filepath.read_bytes()).splitlines()
+            return
+        
+        if filepath.stat().st_size < MMAP_MIN_SIZE:
+            # One read of the whole file, split as raw bytes
+            yield from filepath.read_bytes().splitlines()
+            return
+        
+        # Large files: slice lines straight out of the page cache instead of
+        # holding the whole file and a full list of line copies in memory
+        with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            size = len(mm)
+            while start < size:
+                end = mm.find(b'\n', start)
+                if end < 0:
+                    end = size
+                yield mm[start:end]
+                start = end + 1
+    
     def get_recent_records(
         self,
         days: int = 7,
@@ -254,27 +496,38 @@ class ExecutionHistory:
             file_count = 0
             total_size = 0
             
-            for year_month_dir in self.history_path.iterdir():
-                if year_month_dir.is_dir() and year_month_dir.name != '.':
-                    for file in year_month_dir.glob('*.jsonl'):
-                        file_count += 1
-                        total_size += file.stat().st_size
+            # scandir entries carry the file type, so only sizes need a stat call
+            with os.scandir(self.history_path) as entries:
+                for year_month_dir in entries:
+                    if not year_month_dir.is_dir(follow_symlinks=False):
+                        continue
+                    with os.scandir(year_month_dir.path) as files:
+                        for file in files:
+                            if file.name.endswith(('.jsonl', '.jsonl' + ARCHIVE_SUFFIX)):
+                                file_count += 1
+                                total_size += file.stat().st_size
+            
+            total_records, oldest, newest, months = self._open_index().execute(
+                "SELECT COUNT(*), MIN(day), MAX(day), COUNT(DISTINCT substr(day, 1, 7)) FROM records"
+            ).fetchone()
             
             return {
-                'total_records': self.index['total_records'],
+                'total_records': total_records,
                 'total_files': file_count,
                 'total_size_bytes': total_size,
-                'date_ranges': len(self.index['date_ranges']),
-                'oldest_record': min(self.index['date_ranges'].values(), key=lambda x: x['min'])['min'] if self.index['date_ranges'] else None,
-                'newest_record': max(self.index['date_ranges'].values(), key=lambda x: x['max'])['max'] if self.index['date_ranges'] else None
+                'date_ranges': months,
+                'oldest_record': oldest,
+                'newest_record': newest
             }
     
     def compact_old_records(self, days_to_keep: int = 90) -> int:
         """
-        Archive old records (compress or move to archive)
+        Archive old records by gzip-compressing their daily files
+        
+        Archived files stay queryable; get_records reads them transparently.
         
         Args:
-            days_to_keep: Keep records newer than this
+            days_to_keep: Keep records newer than this uncompressed
             
         Returns:
             Number of files archived
@@ -282,8 +535,33 @@ class ExecutionHistory:
         cutoff_date = datetime.now() - timedelta(days=days_to_keep)
         archived_count = 0
         
-        # TODO: Implement compression/archival
-        # For now, just report what would be archived
+        with self.lock:
+            # Only dates before the cutoff; today's open file is never touched
+            for filepath in self._list_daily_files(date.min, cutoff_date.date() - timedelta(days=1)):
+                if filepath.name.endswith(ARCHIVE_SUFFIX):
+                    continue  # Already archived
+                
+                archive_path = filepath.with_name(filepath.name + ARCHIVE_SUFFIX)
+                temp_path = archive_path.with_name(archive_path.name + '.tmp')
+                
+                try:
+                    # Fast compression level: JSONL still shrinks several-fold
+                    with open(filepath, 'rb') as src, gzip.open(temp_path, 'wb', compresslevel=1) as dst:
+                        shutil.copyfileobj(src, dst)
+                    temp_path.replace(archive_path)
+                    filepath.unlink()
+                    archived_count += 1
+                    
+                    # Same records under a new file state; spare the reindex
+                    stat = archive_path.stat()
+                    self._open_index().execute(
+                        "UPDATE files SET size = ?, mtime_ns = ? WHERE file = ?",
+                        (stat.st_size, stat.st_mtime_ns, filepath.name)
+                    )
+                except Exception as e:
+                    print(f"Error archiving {filepath}: {e}")
+                    if temp_path.exists():
+                        temp_path.unlink()
         
         return archived_count
 
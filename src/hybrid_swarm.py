@@ -11,6 +11,7 @@ Result: Both vertical specialization AND horizontal swarm coordination with emer
 """
 
 import time
+import logging
 from typing import Dict, Any, Optional, Tuple, List
 from datetime import datetime
 from src.adaptive_resonance import AdaptiveResonanceOrchestrator, TaskSignature
@@ -21,6 +22,8 @@ from src.approach_patterns import TaskContext, ExecutionRecord, ContentFeatures
 from src.pattern_analyzer import PatternAnalyzer
 from src.approach_evolution import ApproachEvolution
 
+logger = logging.getLogger(__name__)
+
 
 class HybridSwarmOrchestrator:
     """
@@ -83,13 +86,16 @@ class HybridSwarmOrchestrator:
         specialist_id = self.adaptive_layer.match_or_create_specialist(task)
         
         # Create specialist agent if new
-        if specialist_id not in self.specialist_agents:
+        agent = self.specialist_agents.get(specialist_id)
+        if agent is None:
             agent = StigmergicAgent(specialist_id, self.stigmergic_board)
             self.specialist_agents[specialist_id] = agent
         
-        agent = self.specialist_agents[specialist_id]
         task_id = task.get('id', 'unknown')
         
+        # Read stigmergic signals once; every selection path below shares them
+        signals = self.stigmergic_board.read_signals(task_id, specialist_id)
+        
         # Phase 2: Dynamic Approach Selection (if enabled)
         if self.use_dynamic_approaches and self.approach_manager:
             # Create TaskContext for matching
@@ -104,45 +110,47 @@ class HybridSwarmOrchestrator:
             
             if matches:
                 # Use stigmergic signals to choose among top matches
-                approach_id = self._select_with_signals(matches, task_id, specialist_id)
-                best_match = next(a for a, _ in matches if a.id == approach_id)
+                signal_map = {s['approach']: s['strength'] for s in signals}
+                best_match = self._select_with_signals(matches, signal_map)
+                approach_id = best_match.id
                 
                 # Get approach metadata for LLM guidance
+                sig = best_match.pattern_signature
+                style = best_match.style_characteristics
+                avg_quality = best_match.performance_metrics.avg_quality
+                
                 approach_metadata = {
                     'name': best_match.name,
                     'signature': {
-                        'domains': best_match.pattern_signature.domain_weights,
-                        'complexity_range': (best_match.pattern_signature.complexity_min,
-                                           best_match.pattern_signature.complexity_max),
-                        'keywords': best_match.pattern_signature.keyword_patterns[:5],
-                        'output_types': best_match.pattern_signature.output_types
+                        'domains': sig.domain_weights,
+                        'complexity_range': (sig.complexity_min, sig.complexity_max),
+                        'keywords': sig.keyword_patterns[:5],
+                        'output_types': sig.output_types
                     },
                     'style': {
-                        'structure': best_match.style_characteristics.structure_type,
-                        'tone': best_match.style_characteristics.tone,
-                        'voice': best_match.style_characteristics.voice,
-                        'depth': best_match.style_characteristics.depth_level,
-                        'use_code': best_match.pattern_signature.requires_code,
-                        'use_examples': best_match.pattern_signature.requires_examples
+                        'structure': style.structure_type,
+                        'tone': style.tone,
+                        'voice': style.voice,
+                        'depth': style.depth_level,
+                        'use_code': sig.requires_code,
+                        'use_examples': sig.requires_examples
                     },
-                    'expected_quality': best_match.performance_metrics.avg_quality
+                    'expected_quality': avg_quality
                 }
                 
-                quality_target = best_match.performance_metrics.avg_quality or 0.8
+                quality_target = avg_quality or 0.8
             else:
                 # Fallback to legacy approach
-                approach_id = agent.select_approach(task_id)
+                approach_id = agent.select_approach(task_id, signals)
                 approach_metadata = None
                 quality_target = 0.7
         else:
             # Legacy stigmergic approach selection
-            approach_id = agent.select_approach(task_id)
+            approach_id = agent.select_approach(task_id, signals)
             approach_metadata = None
             
             # Get quality estimate from signal strength
-            signals = self.stigmergic_board.read_signals(task_id, specialist_id)
-            quality_target = max([s['strength'] / 100.0 for s in signals], default=0.5)
-            quality_target = min(quality_target, 1.0)
+            quality_target = min(max((s['strength'] for s in signals), default=50.0) / 100.0, 1.0)
         
         result = {
             "specialist_id": specialist_id,
@@ -184,8 +192,8 @@ class HybridSwarmOrchestrator:
         self.adaptive_layer.record_execution(specialist_id, success, actual_quality)
         
         # Update stigmergic layer (approach reinforcement)
-        if specialist_id in self.specialist_agents:
-            agent = self.specialist_agents[specialist_id]
+        agent = self.specialist_agents.get(specialist_id)
+        if agent is not None:
             agent.board.deposit_signal(task_id, approach_id, actual_quality, specialist_id)
         
         # Update dynamic approaches system (if enabled)
@@ -198,10 +206,11 @@ class HybridSwarmOrchestrator:
                 # Create TaskContext object
                 tc = self._create_task_context(task_context, task_id)
                 
-                # Create execution record
+                # Create execution record (one clock read for ID and timestamp)
+                now_s = time.time()
                 record = ExecutionRecord(
-                    record_id=f"exec_{task_id}_{int(time.time())}",
-                    timestamp=datetime.now(),
+                    record_id=f"exec_{task_id}_{int(now_s)}",
+                    timestamp=datetime.fromtimestamp(now_s),
                     task_context=tc,
                     specialist_id=specialist_id,
                     approach_id=approach_id,
@@ -242,45 +251,50 @@ class HybridSwarmOrchestrator:
     def _select_with_signals(
         self,
         matches: List[Tuple[Any, float]],
-        task_id: str,
-        specialist_id: str
-    ) -> str:
+        signal_map: Dict[str, float]
+    ) -> Any:
         """
         Select approach from matches using stigmergic signals
         Blends match scores with signal strength for exploration/exploitation
-        """
-        # Get signals for this task/specialist
-        signals = self.stigmergic_board.read_signals(task_id, specialist_id)
-        signal_map = {s['approach']: s['strength'] for s in signals}
         
-        # Calculate combined scores (70% match, 30% signal)
-        scores = []
+        Args:
+            matches: (approach, match_score) tuples
+            signal_map: Current signal strength per approach for this task/specialist
+            
+        Returns:
+            The selected approach object from matches
+        """
+        # Calculate combined scores (70% match, 30% signal), keeping the first best
+        best_approach = None
+        best_score = None
         for approach, match_score in matches:
             signal_strength = signal_map.get(approach.id, 0.0)
             combined = 0.7 * match_score + 0.3 * (signal_strength / 100.0)
-            scores.append((approach.id, combined))
+            if best_score is None or combined > best_score:
+                best_approach = approach
+                best_score = combined
         
-        # Select best combined score
-        if scores:
-            return max(scores, key=lambda x: x[1])[0]
+        if best_approach is not None:
+            return best_approach
         
         # Fallback to first match
-        return matches[0][0].id
+        return matches[0][0]
     
     def _trigger_pattern_discovery(self):
         """Trigger pattern discovery and approach creation"""
-        print(f"\n🔍 Pattern Discovery: Analyzing {self._execution_count} executions...")
+        logger.info("[pattern-discovery] Analyzing %d executions", self._execution_count)
         
         try:
             # Discover patterns
             clusters = self.pattern_analyzer.discover_patterns(
                 min_cluster_size=10,
                 min_quality=0.8,
-                similarity_threshold=0.65
+                similarity_threshold=0.65,
+                window=self._pattern_discovery_threshold * 4
             )
             
             if clusters:
-                print(f"✓ Found {len(clusters)} patterns")
+                logger.info("[pattern-discovery] Found %d patterns", len(clusters))
                 
                 # Create approaches from patterns
                 for i, cluster in enumerate(clusters, 1):
@@ -292,12 +306,12 @@ class HybridSwarmOrchestrator:
                     )
                     
                     if approach:
-                        print(f"  ✓ Created: {approach.name}")
+                        logger.info("[pattern-discovery] Created approach: %s", approach.name)
             else:
-                print("  - No patterns found (need more diverse data)")
+                logger.info("[pattern-discovery] No patterns found (need more diverse data)")
                 
         except Exception as e:
-            print(f"  ✗ Pattern discovery failed: {e}")
+            logger.warning("[pattern-discovery] Pattern discovery failed: %s", e)
     
     def get_system_stats(self) -> Dict[str, Any]:
         """Get statistics from both coordination layers"""
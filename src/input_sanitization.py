@@ -9,6 +9,41 @@ from pathlib import Path
 from typing import Optional
 
 
+# Non-printable Latin-1 code points (except tab and newline), deleted via str.translate
+_CONTROL_CHAR_TABLE = dict.fromkeys(
+    c for c in range(0x100)
+    if not chr(c).isprintable() and chr(c) not in '\t\n'
+)
+
+# JSON string escapes for ASCII text, identical to json.dumps (ensure_ascii)
+_JSON_SHORT_ESCAPES = {'"': '\\"', '\\': '\\\\', '\b': '\\b', '\f': '\\f', '\n': '\\n', '\r': '\\r', '\t': '\\t'}
+_JSON_ESCAPE_TABLE = {
+    c: _JSON_SHORT_ESCAPES.get(chr(c), '\\u{0:04x}'.format(c))
+    for c in range(0x80)
+    if chr(c) in _JSON_SHORT_ESCAPES or c < 0x20 or c == 0x7f
+}
+
+# ASCII control characters removed by sanitize_prompt (everything but tab/newline)
+_ASCII_CONTROL_RE = re.compile(r'[\x00-\x08\x0b-\x1f\x7f]')
+
+# Runs of characters not allowed in identifiers / (lowercased) filenames
+_ID_STRIP_RE = re.compile(r'[^A-Za-z0-9_]+')
+_FILENAME_STRIP_RE = re.compile(r'[^a-z0-9_\-.]+')
+
+# Distinct non-printable characters sanitize_prompt removes with str.replace;
+# more are removed with one regex pass
+_FEW_OFFENDERS = 4
+
+# Whitespace runs, collapsed to a single space
+_WS_RE = re.compile(r'\s+')
+
+# ASCII lowercase plus space -> underscore in a single pass
+_FILENAME_PREP_TABLE = str.maketrans(
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZ ',
+    'abcdefghijklmnopqrstuvwxyz_'
+)
+
+
 class SanitizationError(Exception):
     """Raised when input cannot be safely sanitized"""
     pass
@@ -17,10 +52,11 @@ class SanitizationError(Exception):
 class InputSanitizer:
     """Centralized input sanitization for all entry points"""
     
+    __slots__ = ('max_prompt_length', 'max_id_length')
+    
     def __init__(self):
         self.max_prompt_length = 10000
         self.max_id_length = 100
-        self.allowed_filename_chars = set("abcdefghijklmnopqrstuvwxyz0123456789_-.")
     
     def sanitize_prompt(self, prompt: str) -> str:
         """
@@ -44,16 +80,37 @@ class InputSanitizer:
         if not isinstance(prompt, str):
             raise ValueError(f"Prompt must be string, got {type(prompt)}")
         
-        # 1. UTF-8 encode/decode with error handling
-        # This replaces invalid UTF-8 sequences with  (replacement character)
-        prompt = prompt.encode('utf-8', errors='replace').decode('utf-8')
-        
-        # 2. Remove control characters (keep \t, \n)
-        # Control characters (0x00-0x1F except tab and newline) can break terminals
-        prompt = ''.join(
-            char for char in prompt 
-            if char.isprintable() or char in '\t\n'
-        )
+        if prompt.isascii():
+            # Fast path: short ASCII prompts without control characters only
+            # need whitespace normalization (steps 1-3 would not change them)
+            if len(prompt) <= self.max_prompt_length and _ASCII_CONTROL_RE.search(prompt) is None:
+                return _WS_RE.sub(' ', prompt).strip()
+            
+            # ASCII is always valid UTF-8 (step 1 is a no-op) and needs no
+            # Unicode database lookups to find control characters (step 2)
+            prompt = _ASCII_CONTROL_RE.sub('', prompt)
+        else:
+            # 1. UTF-8 encode/decode with error handling
+            # This replaces invalid UTF-8 sequences with  (replacement character)
+            prompt = prompt.encode('utf-8', errors='replace').decode('utf-8')
+            
+            # 2. Remove control characters (keep \t, \n)
+            # Control characters (0x00-0x1F except tab and newline) can break terminals
+            prompt = prompt.translate(_CONTROL_CHAR_TABLE)
+            
+            # Non-printable code points beyond Latin-1 (format characters,
+            # separators, unassigned) are rare; only then check each distinct
+            # character once and delete the offenders with C-level scans
+            if not prompt.isascii() and not prompt.replace('\t', ' ').replace('\n', ' ').isprintable():
+                offenders = [
+                    char for char in set(prompt)
+                    if not char.isprintable() and char not in '\t\n'
+                ]
+                if len(offenders) <= _FEW_OFFENDERS:
+                    for char in offenders:
+                        prompt = prompt.replace(char, '')
+                else:
+                    prompt = re.sub('[' + re.escape(''.join(offenders)) + ']', '', prompt)
         
         # 3. Length limit (prevent DoS via huge inputs)
         if len(prompt) > self.max_prompt_length:
@@ -61,7 +118,7 @@ class InputSanitizer:
             prompt += "... [truncated]"
         
         # 4. Normalize whitespace (collapse multiple spaces)
-        prompt = ' '.join(prompt.split())
+        prompt = _WS_RE.sub(' ', prompt).strip()
         
         return prompt
     
@@ -89,11 +146,8 @@ class InputSanitizer:
         # Remove any path components (prevent path traversal)
         identifier = identifier.split('/')[-1].split('\\')[-1]
         
-        # Keep only safe characters (alphanumeric + underscore)
-        identifier = ''.join(
-            char for char in identifier 
-            if char.isalnum() or char == '_'
-        )
+        # Keep only safe characters (ASCII alphanumeric + underscore)
+        identifier = _ID_STRIP_RE.sub('', identifier)
         
         # Length limit
         identifier = identifier[:self.max_id_length]
@@ -107,12 +161,21 @@ class InputSanitizer:
         """
         Prepare text for JSON storage (escape quotes, backslashes)
         
+        Only needed when a string is spliced into hand-built JSON text. To
+        produce a whole document, pass the raw values to json_codec.dumps,
+        which escapes them while serializing; escaping here first and then
+        re-parsing the result scans every string twice.
+        
         Args:
             text: Text to sanitize for JSON
             
         Returns:
             JSON-safe string
         """
+        # ASCII text: escape in one pass without building a quoted JSON string
+        if isinstance(text, str) and text.isascii():
+            return text.translate(_JSON_ESCAPE_TABLE)
+        
         # Use json.dumps to properly escape, then remove surrounding quotes
         return json.dumps(text)[1:-1]
     
@@ -133,13 +196,14 @@ class InputSanitizer:
         filename = filename.split('/')[-1].split('\\')[-1]
         
         # Convert to lowercase, replace spaces with underscores
-        filename = filename.lower().replace(' ', '_')
+        if filename.isascii():
+            filename = filename.translate(_FILENAME_PREP_TABLE)
+        else:
+            # Unicode lowercasing can produce ASCII letters (e.g. KELVIN SIGN -> 'k')
+            filename = filename.lower().replace(' ', '_')
         
         # Keep only allowed characters
-        filename = ''.join(
-            char for char in filename
-            if char in self.allowed_filename_chars
-        )
+        filename = _FILENAME_STRIP_RE.sub('', filename)
         
         # Ensure has extension
         if '.' not in filename:
@@ -170,6 +234,22 @@ class InputSanitizer:
         return max(0.0, min(1.0, quality))
 
 
+# Module-level sanitizer instance
+_sanitizer = InputSanitizer()
+
+# safe_sanitize dispatch tables: method name -> sanitizer / fallback value
+_METHODS = {
+    "prompt": _sanitizer.sanitize_prompt,
+    "identifier": _sanitizer.sanitize_identifier,
+    "filename": _sanitizer.sanitize_filename,
+}
+_FALLBACKS = {
+    "prompt": lambda text: "[Input could not be processed safely]",
+    "identifier": lambda text: f"sanitized_{hash(text) % 1000000}",
+    "filename": lambda text: "unknown.json",
+}
+
+
 def safe_sanitize(text: str, context: str = "input", method: str = "prompt") -> str:
     """
     Wrapper with error handling for sanitization
@@ -183,35 +263,20 @@ def safe_sanitize(text: str, context: str = "input", method: str = "prompt") ->
         Sanitized text or safe fallback
     """
     try:
-        sanitizer = InputSanitizer()
-        
-        if method == "prompt":
-            return sanitizer.sanitize_prompt(text)
-        elif method == "identifier":
-            return sanitizer.sanitize_identifier(text)
-        elif method == "filename":
-            return sanitizer.sanitize_filename(text)
-        else:
+        sanitize = _METHODS.get(method)
+        if sanitize is None:
             raise ValueError(f"Unknown sanitization method: {method}")
+        return sanitize(text)
             
     except Exception as e:
         # Log error (in production, use proper logging)
         print(f"WARNING: Sanitization failed for {context}: {e}")
         
         # Return safe fallback
-        if method == "prompt":
-            return "[Input could not be processed safely]"
-        elif method == "identifier":
-            return f"sanitized_{hash(text) % 1000000}"
-        elif method == "filename":
-            return "unknown.json"
-        else:
-            return ""
+        fallback = _FALLBACKS.get(method)
+        return fallback(text) if fallback is not None else ""
 
 
-# Module-level sanitizer instance
-_sanitizer = InputSanitizer()
-
 # Convenience functions
 def sanitize_prompt(prompt: str) -> str:
     """Module-level convenience function"""
@@ -0,0 +1,53 @@
+"""
+JSON Codec
+Fast JSON encoding/decoding for persistent storage
+
+Uses orjson when it is installed and falls back to the standard library
+json module otherwise. Both paths produce standard JSON, so files written
+by one can always be read by the other.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    _INDENT_OPTIONS = _OPTIONS | orjson.OPT_INDENT_2
+    _loads = orjson.loads
+else:
+    _loads = json.loads
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize object to UTF-8 encoded JSON bytes
+
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with 2-space indentation
+
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=_INDENT_OPTIONS if indent else _OPTIONS)
+
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserialize JSON from bytes or str
+
+    Args:
+        data: JSON document
+
+    Returns:
+        Deserialized object
+    """
+    return _loads(data)
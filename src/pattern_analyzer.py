@@ -3,20 +3,344 @@ Pattern Analyzer
 Discovers patterns in execution history for creating new approaches
 """
 
-import json
+import math
+import hashlib
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
-from dataclasses import dataclass, asdict
-from collections import Counter
+from functools import lru_cache
+from itertools import chain
+from dataclasses import dataclass, field, asdict
+from collections import Counter, OrderedDict
+import numpy as np
 from src.approach_patterns import (
     ExecutionRecord, PatternSignature, StyleCharacteristics,
     ApproachPattern, PerformanceMetrics
 )
 from src.execution_history import ExecutionHistory
+from src import json_codec
 from src.content_analyzer import ContentAnalyzer
 
 
+# Feature vector layout (see PatternAnalyzer.extract_feature_vector)
+_DOMAIN_NAMES = ('research', 'writing', 'coding', 'review', 'comparison', 'analysis')
+_OUTPUT_TYPES = ('tutorial', 'code', 'explanation', 'list', 'comparison', 'report')
+_CONTENT_FEATURE_KEYS = (
+    'has_code', 'has_numbered_list', 'has_bullets', 'section_count',
+    'code_ratio', 'explanation_ratio', 'example_ratio', 'formality'
+)
+FEATURE_KEYS = (
+    tuple(f'domain_{domain}' for domain in _DOMAIN_NAMES)
+    + ('complexity',)
+    + tuple(f'output_{otype}' for otype in _OUTPUT_TYPES)
+    + _CONTENT_FEATURE_KEYS
+)
+
+# Precomputed feature-vector segments: output-type one-hot rows and the
+# missing-content filler (NaN)
+_OUTPUT_ONE_HOT = {
+    otype: tuple(1.0 if other == otype else 0.0 for other in _OUTPUT_TYPES)
+    for otype in _OUTPUT_TYPES
+}
+_NO_OUTPUT_TYPE = (0.0,) * len(_OUTPUT_TYPES)
+_MISSING_CONTENT = (math.nan,) * len(_CONTENT_FEATURE_KEYS)
+
+# Similarity-matrix rows computed at once when building the similarity graph
+SIMILARITY_BLOCK_ROWS = 512
+
+# Histories at least this large are clustered with a radius-neighbor index
+# (scikit-learn, when installed) instead of the full similarity matrix
+NEIGHBOR_INDEX_MIN_RECORDS = 2000
+
+
+@lru_cache(maxsize=None)
+def _nearest_neighbors_class():
+    """scikit-learn's NearestNeighbors, imported on first use (None if not installed)"""
+    try:
+        from sklearn.neighbors import NearestNeighbors
+    except ImportError:  # Optional dependency
+        return None
+    
+    return NearestNeighbors
+
+
+@lru_cache(maxsize=None)
+def _hdbscan_class():
+    """scikit-learn's HDBSCAN (1.3+), imported on first use (None if not installed)"""
+    try:
+        from sklearn.cluster import HDBSCAN
+    except ImportError:  # Optional dependency
+        return None
+    
+    return HDBSCAN
+
+
+@lru_cache(maxsize=None)
+def _connected_components_function():
+    """
+    Connected-component labelling for the similarity graph
+    
+    Uses scipy.sparse.csgraph when installed (it comes with scikit-learn),
+    otherwise the pure-Python union-find below.
+    """
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import connected_components
+    except ImportError:  # Optional dependency
+        return _union_find_labels
+    
+    def scipy_labels(count: int, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        graph = csr_matrix((np.ones(len(rows), dtype=bool), (rows, cols)), shape=(count, count))
+        return connected_components(graph, directed=False)[1]
+    
+    return scipy_labels
+
+
+def _union_find_labels(count: int, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    Label the connected components of an undirected graph given as edge lists
+    
+    Args:
+        count: Number of nodes
+        rows: Edge start nodes
+        cols: Edge end nodes
+        
+    Returns:
+        Component label per node (the smallest node index in its component)
+    """
+    parent = list(range(count))
+    
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]  # Path halving
+            node = parent[node]
+        return node
+    
+    for a, b in zip(rows.tolist(), cols.tolist()):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            # Keep the smaller index as root so labels follow record order
+            if root_a < root_b:
+                parent[root_b] = root_a
+            else:
+                parent[root_a] = root_b
+    
+    return np.array([find(node) for node in range(count)], dtype=np.intp)
+
+
+def _normalize_rows(X: np.ndarray) -> np.ndarray:
+    """L2-normalize each row of X (zero rows stay zero)"""
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    normalized = np.zeros_like(X)
+    np.divide(X, norms, out=normalized, where=norms > 0)
+    return normalized
+
+
+def _similarity_matrix(
+    Xa: np.ndarray,
+    present_a: np.ndarray,
+    Xb: np.ndarray,
+    present_b: np.ndarray
+) -> np.ndarray:
+    """
+    Cosine similarity of every row of Xa with every row of Xb, over shared features
+    
+    Records without content features have fewer features, so magnitudes
+    are taken over the features each pair shares, not over whole rows.
+    
+    Args:
+        Xa, Xb: Feature matrices (0.0 where a feature is missing)
+        present_a, present_b: Matching feature-presence masks
+        
+    Returns:
+        (len(Xa), len(Xb)) similarity matrix (0.0 for pairs with a zero magnitude)
+    """
+    dot = Xa @ Xb.T
+    
+    # shared_sq_a[i, j]: squared magnitude of a-row i over the features b-row j has
+    shared_sq_a = (Xa * Xa) @ present_b.T.astype(Xa.dtype)
+    shared_sq_b = present_a.astype(Xb.dtype) @ (Xb * Xb).T
+    magnitudes = np.sqrt(shared_sq_a * shared_sq_b)
+    
+    similarity = np.zeros_like(dot)
+    np.divide(dot, magnitudes, out=similarity, where=magnitudes > 0)
+    return similarity
+
+
+def _dense_similarity(X: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """
+    Full (N, N) similarity matrix, picking the cheapest exact method
+    
+    Args:
+        X: (N, D) feature matrix (0.0 where a feature is missing)
+        present: (N, D) feature-presence mask
+    """
+    if present.all():
+        # Same features everywhere: normalize once, similarity is a plain dot product
+        normalized = _normalize_rows(X)
+        return normalized @ normalized.T
+    
+    return _similarity_matrix_kernel()(X, present, X, present)
+
+
+def _similarity_edges(
+    X: np.ndarray,
+    present: np.ndarray,
+    threshold: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Edges of the graph linking records with similarity >= threshold
+    
+    Similarities are computed SIMILARITY_BLOCK_ROWS rows at a time and
+    thresholded right away, so only a (block, N) float32 slab is ever in
+    memory instead of the full (N, N) matrix and its temporaries. Only
+    the upper triangle is computed; each undirected edge is listed once.
+    
+    Args:
+        X: (N, D) feature matrix (0.0 where a feature is missing)
+        present: (N, D) feature-presence mask
+        threshold: Minimum similarity for an edge
+        
+    Returns:
+        (rows, cols) index arrays of the edges, with rows < cols
+    """
+    count = len(X)
+    uniform = present.all()
+    if uniform:
+        # Same features everywhere: normalize once, similarity is a plain dot product
+        normalized = _normalize_rows(X)
+    else:
+        kernel = _similarity_matrix_kernel()
+    
+    rows = [np.empty(0, dtype=np.intp)]
+    cols = [np.empty(0, dtype=np.intp)]
+    for start in range(0, count, SIMILARITY_BLOCK_ROWS):
+        stop = min(start + SIMILARITY_BLOCK_ROWS, count)
+        # Similarity is symmetric: compare the block only with itself and later records
+        if uniform:
+            similarity = normalized[start:stop] @ normalized[start:].T
+        else:
+            similarity = kernel(X[start:stop], present[start:stop], X[start:], present[start:])
+        
+        block_rows, block_cols = np.nonzero(similarity >= threshold)
+        block_rows += start
+        block_cols += start
+        upper = block_cols > block_rows
+        rows.append(block_rows[upper])
+        cols.append(block_cols[upper])
+    
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def _group_by_label(labels: np.ndarray, min_size: int) -> List[np.ndarray]:
+    """
+    Group record indices by cluster label
+    
+    Args:
+        labels: Cluster label per record (negative labels mark noise)
+        min_size: Minimum records per group
+        
+    Returns:
+        Row indices of each group of at least min_size records, in record
+        order, ordered by each group's first record
+    """
+    order = np.argsort(labels, kind='stable')
+    order = order[labels[order] >= 0]
+    _, starts, sizes = np.unique(labels[order], return_index=True, return_counts=True)
+    groups = [
+        order[start:start + size]
+        for start, size in zip(starts.tolist(), sizes.tolist())
+        if size >= min_size
+    ]
+    groups.sort(key=lambda members: members[0])
+    return groups
+
+
+def _radius_neighbor_edges(
+    X: np.ndarray,
+    present: np.ndarray,
+    threshold: float
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Similarity-graph edges (cosine similarity >= threshold) from a tree index
+    
+    On L2-normalized rows, cosine >= threshold is the same as Euclidean
+    distance <= sqrt(2 - 2 * threshold), which a ball/kd-tree answers
+    without comparing every pair.
+    
+    Args:
+        X: (N, D) feature matrix (0.0 where a feature is missing)
+        present: (N, D) feature-presence mask
+        threshold: Minimum cosine similarity
+        
+    Returns:
+        (rows, cols) index arrays of the edges, with rows < cols, or None
+        when the index does not apply: small histories, scikit-learn missing,
+        non-positive thresholds, or records with differing feature keys
+        (whose similarities need per-pair magnitudes)
+    """
+    if len(X) < NEIGHBOR_INDEX_MIN_RECORDS or threshold <= 0 or not present.all():
+        return None
+    
+    NearestNeighbors = _nearest_neighbors_class()
+    if NearestNeighbors is None:
+        return None
+    
+    # Zero vectors are similar to nothing; leave them out of the index
+    normalized = _normalize_rows(X)
+    indexed = np.flatnonzero(normalized.any(axis=1))
+    normalized = normalized[indexed]
+    
+    radius = float(np.sqrt(max(0.0, 2.0 - 2.0 * threshold)))
+    index = NearestNeighbors(radius=radius).fit(normalized)
+    
+    # Sparse neighbor graph -> edge arrays, each undirected edge once
+    graph = index.radius_neighbors_graph(normalized, mode='connectivity').tocoo()
+    rows = indexed[graph.row]
+    cols = indexed[graph.col]
+    upper = cols > rows
+    return rows[upper], cols[upper]
+
+
+def _similarity_matrix_loop(Xa, present_a, Xb, present_b):
+    """Single-pass loop version of _similarity_matrix, compiled with numba"""
+    rows, width = Xa.shape
+    cols = Xb.shape[0]
+    similarity = np.zeros((rows, cols), dtype=np.float32)
+    for i in range(rows):
+        for j in range(cols):
+            dot = 0.0
+            sq_i = 0.0
+            sq_j = 0.0
+            for k in range(width):
+                if present_a[i, k] and present_b[j, k]:
+                    a = Xa[i, k]
+                    b = Xb[j, k]
+                    dot += a * b
+                    sq_i += a * a
+                    sq_j += b * b
+            if sq_i > 0.0 and sq_j > 0.0:
+                similarity[i, j] = dot / math.sqrt(sq_i * sq_j)
+    return similarity
+
+
+@lru_cache(maxsize=None)
+def _similarity_matrix_kernel():
+    """
+    Similarity kernel for clustering
+    
+    numba is imported on first use and compiles the fused loop, which
+    avoids the temporaries of the NumPy version. Falls back to NumPy
+    without it.
+    """
+    try:
+        import numba
+    except ImportError:  # Optional dependency
+        return _similarity_matrix
+    
+    return numba.njit(cache=True, fastmath=True)(_similarity_matrix_loop)
+
+
 @dataclass
 class PatternCluster:
     """Represents a discovered pattern from clustered executions"""
@@ -27,6 +351,10 @@ class PatternCluster:
     is_novel: bool = True
     is_consistent: bool = True
     
+    # Signature/style derived by PatternAnalyzer, memoized on first use
+    _signature: Optional[PatternSignature] = field(default=None, init=False, repr=False, compare=False)
+    _style: Optional[StyleCharacteristics] = field(default=None, init=False, repr=False, compare=False)
+    
     def to_dict(self) -> dict:
         """Convert to dictionary"""
         return {
@@ -47,18 +375,25 @@ class PatternAnalyzer:
     def __init__(
         self,
         history: Optional[ExecutionHistory] = None,
-        patterns_path: str = "data/patterns"
+        patterns_path: str = "data/patterns",
+        cache_size: int = 32
     ):
         self.history = history or ExecutionHistory()
         self.content_analyzer = ContentAnalyzer()
         self.patterns_path = Path(patterns_path)
         self.patterns_path.mkdir(parents=True, exist_ok=True)
+        
+        # Discovered clusters per (records, parameters) digest (LRU, most recent last)
+        self._discovery_cache = OrderedDict()
+        self._discovery_cache_max = cache_size
     
     def discover_patterns(
         self,
         min_cluster_size: int = 10,
         min_quality: float = 0.8,
-        similarity_threshold: float = 0.7
+        similarity_threshold: float = 0.7,
+        window: Optional[int] = None,
+        method: str = "threshold"
     ) -> List[PatternCluster]:
         """
         Discover patterns in successful executions using simple clustering
@@ -67,6 +402,9 @@ class PatternAnalyzer:
             min_cluster_size: Minimum records to form a cluster
             min_quality: Minimum quality for successful executions
             similarity_threshold: Threshold for considering records similar (0-1)
+            window: Only cluster the most recent N successful executions (None for all)
+            method: "threshold" (similarity graph components) or "density"
+                (HDBSCAN, ignores similarity_threshold; needs scikit-learn 1.3+)
             
         Returns:
             List of PatternCluster objects
@@ -74,173 +412,229 @@ class PatternAnalyzer:
         # Get successful executions
         successful = self.history.get_records(min_quality=min_quality)
         
+        # Clustering is quadratic; bound it to recent executions when asked
+        if window is not None and len(successful) > window:
+            successful = successful[-window:]
+        
         if len(successful) < min_cluster_size:
             print(f"Not enough successful executions: {len(successful)} < {min_cluster_size}")
             return []
         
+        if method == "density" and _hdbscan_class() is None:
+            print("WARNING: Density clustering needs scikit-learn 1.3+, using threshold clustering")
+            method = "threshold"
+        elif method not in ("threshold", "density"):
+            raise ValueError(f"Unknown clustering method: {method}")
+        
+        # Same records and parameters give the same clusters; skip re-clustering
+        key = self._discovery_key(successful, min_cluster_size, min_quality, similarity_threshold, method)
+        cached = self._discovery_cache.get(key)
+        if cached is not None:
+            self._discovery_cache.move_to_end(key)
+            print(f"Found {len(cached)} clusters (cached)")
+            return list(cached)
+        
         print(f"Analyzing {len(successful)} successful executions...")
         
-        # Extract feature vectors
-        feature_vectors = []
-        for record in successful:
-            features = self.extract_feature_vector(record)
-            feature_vectors.append(features)
-        
-        # Simple threshold-based clustering
-        clusters = self._cluster_by_similarity(
-            successful,
-            feature_vectors,
-            similarity_threshold,
-            min_cluster_size
-        )
+        # Extract feature vectors (one row per record)
+        features = self.extract_feature_matrix(successful)
+        
+        if method == "density":
+            clusters = self._cluster_by_density(features, min_cluster_size)
+        else:
+            # Threshold-based clustering
+            clusters = self._cluster_by_similarity(
+                features,
+                similarity_threshold,
+                min_cluster_size
+            )
         
         print(f"Found {len(clusters)} clusters")
         
         # Analyze each cluster
         pattern_clusters = []
-        for i, (cluster_records, cluster_features) in enumerate(clusters):
+        for i, members in enumerate(clusters):
             cluster = self._analyze_cluster(
                 f"cluster_{i}",
-                cluster_records,
-                cluster_features
+                [successful[j] for j in members],
+                features[members]
             )
             pattern_clusters.append(cluster)
         
         # Save discovered patterns
         self._save_patterns(pattern_clusters)
         
-        return pattern_clusters
+        self._discovery_cache[key] = pattern_clusters
+        while len(self._discovery_cache) > self._discovery_cache_max:
+            self._discovery_cache.popitem(last=False)
+        
+        return list(pattern_clusters)
     
-    def extract_feature_vector(self, record: ExecutionRecord) -> Dict[str, float]:
+    @staticmethod
+    def _discovery_key(
+        records: List[ExecutionRecord],
+        min_cluster_size: int,
+        min_quality: float,
+        similarity_threshold: float,
+        method: str
+    ) -> str:
+        """Digest of the clustered record IDs and discovery parameters"""
+        digest = hashlib.sha256()
+        for record in records:
+            digest.update(record.record_id.encode('utf-8'))
+            digest.update(b'\0')
+        digest.update(repr((min_cluster_size, min_quality, similarity_threshold, method)).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def extract_feature_vector(self, record: ExecutionRecord) -> np.ndarray:
         """
-        Convert execution record to feature dictionary for clustering
+        Convert execution record to a float32 feature vector for clustering
         
-        Features include:
+        Values are laid out as FEATURE_KEYS. Features include:
         - Domain weights
         - Complexity
         - Output type
-        - Content characteristics
+        - Content characteristics (NaN when the record has none)
+        """
+        return np.array(self._feature_values(record), dtype=np.float32)
+    
+    def extract_feature_matrix(self, records: List[ExecutionRecord]) -> np.ndarray:
         """
-        features = {}
+        Feature vectors of many records as one (N, len(FEATURE_KEYS)) float32 matrix
+        
+        Equivalent to stacking extract_feature_vector for each record, but
+        converts all values to NumPy in a single call.
+        """
+        width = len(FEATURE_KEYS)
+        values = chain.from_iterable(self._feature_values(record) for record in records)
+        matrix = np.fromiter(values, dtype=np.float32, count=len(records) * width)
+        return matrix.reshape(len(records), width)
+    
+    @staticmethod
+    def _feature_values(record: ExecutionRecord) -> List[float]:
+        """Feature values of a record as a Python list, laid out as FEATURE_KEYS"""
+        task_context = record.task_context
         
         # Domain features (normalized)
-        domain_names = ['research', 'writing', 'coding', 'review', 'comparison', 'analysis']
-        for domain in domain_names:
-            features[f'domain_{domain}'] = record.task_context.domain_weights.get(domain, 0.0)
+        values = [task_context.domain_weights.get(domain, 0.0) for domain in _DOMAIN_NAMES]
         
         # Complexity
-        features['complexity'] = record.task_context.complexity
+        values.append(task_context.complexity)
         
         # Output type (one-hot encoding)
-        output_types = ['tutorial', 'code', 'explanation', 'list', 'comparison', 'report']
-        for otype in output_types:
-            features[f'output_{otype}'] = 1.0 if record.task_context.output_type == otype else 0.0
+        values.extend(_OUTPUT_ONE_HOT.get(task_context.output_type, _NO_OUTPUT_TYPE))
         
         # Content features (if available)
         if record.content_features:
             cf = record.content_features
-            features['has_code'] = 1.0 if cf.has_code_blocks else 0.0
-            features['has_numbered_list'] = 1.0 if cf.has_numbered_list else 0.0
-            features['has_bullets'] = 1.0 if cf.has_bullets else 0.0
-            features['section_count'] = min(1.0, cf.section_count / 10.0)  # Normalize
-            features['code_ratio'] = cf.code_ratio
-            features['explanation_ratio'] = cf.explanation_ratio
-            features['example_ratio'] = cf.example_ratio
-            features['formality'] = cf.formality_score
+            values.extend((
+                1.0 if cf.has_code_blocks else 0.0,
+                1.0 if cf.has_numbered_list else 0.0,
+                1.0 if cf.has_bullets else 0.0,
+                min(1.0, cf.section_count / 10.0),  # Normalize
+                cf.code_ratio,
+                cf.explanation_ratio,
+                cf.example_ratio,
+                cf.formality_score
+            ))
+        else:
+            values.extend(_MISSING_CONTENT)
         
-        return features
+        return values
     
     def _cluster_by_similarity(
         self,
-        records: List[ExecutionRecord],
-        feature_vectors: List[Dict[str, float]],
+        features: np.ndarray,
         threshold: float,
         min_size: int
-    ) -> List[Tuple[List[ExecutionRecord], List[Dict[str, float]]]]:
-        """
-        Simple threshold-based clustering
-        Groups records that are similar above threshold
+    ) -> List[np.ndarray]:
         """
-        clusters = []
-        used = set()
+        Threshold-based clustering
+        Groups records connected by similarities above threshold (the
+        connected components of the similarity graph), so the result does
+        not depend on the order records are visited in
         
-        for i, (record, features) in enumerate(zip(records, feature_vectors)):
-            if i in used:
-                continue
-            
-            # Start new cluster with this record
-            cluster_records = [record]
-            cluster_features = [features]
-            used.add(i)
-            
-            # Find similar records
-            for j, (other_record, other_features) in enumerate(zip(records, feature_vectors)):
-                if j in used or j == i:
-                    continue
-                
-                # Calculate similarity
-                similarity = self._calculate_similarity(features, other_features)
-                
-                if similarity >= threshold:
-                    cluster_records.append(other_record)
-                    cluster_features.append(other_features)
-                    used.add(j)
+        Args:
+            features: (N, len(FEATURE_KEYS)) feature matrix, NaN for missing features
+            threshold: Minimum similarity for an edge
+            min_size: Minimum records per cluster
             
-            # Only keep clusters above minimum size
-            if len(cluster_records) >= min_size:
-                clusters.append((cluster_records, cluster_features))
+        Returns:
+            Row indices of each cluster, in record order
+        """
+        count = len(features)
+        present = ~np.isnan(features)
+        X = np.where(present, features, np.float32(0.0))
         
-        return clusters
+        # Similarity graph edges (i, j) with similarity >= threshold
+        edges = _radius_neighbor_edges(X, present, threshold)
+        if edges is None:
+            edges = _similarity_edges(X, present, threshold)
+        rows, cols = edges
+        
+        labels = _connected_components_function()(count, rows, cols)
+        
+        # Only keep clusters above minimum size
+        return _group_by_label(labels, min_size)
     
-    def _calculate_similarity(
+    def _cluster_by_density(
         self,
-        features1: Dict[str, float],
-        features2: Dict[str, float]
-    ) -> float:
-        """
-        Calculate cosine similarity between two feature vectors
+        features: np.ndarray,
+        min_size: int
+    ) -> List[np.ndarray]:
         """
-        # Get common keys
-        keys = set(features1.keys()) & set(features2.keys())
+        Density-based clustering (HDBSCAN), no similarity threshold needed
         
-        if not keys:
-            return 0.0
+        Runs on precomputed distances (1 - similarity), so records without
+        content features are compared on shared features as in
+        _cluster_by_similarity. Records in no dense region are left out.
         
-        # Calculate dot product and magnitudes
-        dot_product = sum(features1[k] * features2[k] for k in keys)
-        mag1 = sum(features1[k] ** 2 for k in keys) ** 0.5
-        mag2 = sum(features2[k] ** 2 for k in keys) ** 0.5
+        Args:
+            features: (N, len(FEATURE_KEYS)) feature matrix, NaN for missing features
+            min_size: Minimum records per cluster
+            
+        Returns:
+            Row indices of each cluster, in record order
+        """
+        present = ~np.isnan(features)
+        X = np.where(present, features, np.float32(0.0))
         
-        if mag1 == 0 or mag2 == 0:
-            return 0.0
+        distances = 1.0 - _dense_similarity(X, present).astype(np.float64)
+        np.clip(distances, 0.0, None, out=distances)
+        np.fill_diagonal(distances, 0.0)
         
-        # Cosine similarity
-        return dot_product / (mag1 * mag2)
+        clusterer = _hdbscan_class()(
+            min_cluster_size=max(2, min_size), min_samples=1, metric='precomputed', copy=False
+        )
+        labels = clusterer.fit(distances).labels_
+        
+        return _group_by_label(labels, min_size)
     
     def _analyze_cluster(
         self,
         cluster_id: str,
         records: List[ExecutionRecord],
-        feature_vectors: List[Dict[str, float]]
+        features: np.ndarray
     ) -> PatternCluster:
         """
         Analyze a cluster to determine its characteristics
         """
         # Calculate average quality
-        avg_quality = sum(r.actual_quality for r in records) / len(records)
-        
-        # Calculate feature centroid (average of all features)
-        centroid = {}
-        all_keys = set()
-        for features in feature_vectors:
-            all_keys.update(features.keys())
-        
-        for key in all_keys:
-            values = [f.get(key, 0.0) for f in feature_vectors]
-            centroid[key] = sum(values) / len(values)
+        qualities = np.fromiter((r.actual_quality for r in records), dtype=np.float64, count=len(records))
+        avg_quality = float(qualities.mean())
+        
+        # Calculate feature centroid (average of all features, missing counts
+        # as 0.0; features no record in the cluster has are left out)
+        present = ~np.isnan(features)
+        means = np.where(present, features, 0.0).mean(axis=0)
+        centroid = {
+            key: float(mean)
+            for key, mean, has_key in zip(FEATURE_KEYS, means, present.any(axis=0))
+            if has_key
+        }
         
         # Check consistency (quality variance)
-        quality_std = (sum((r.actual_quality - avg_quality) ** 2 for r in records) / len(records)) ** 0.5
+        quality_std = float(qualities.std())
         is_consistent = quality_std < 0.15  # Low variance = consistent
         
         return PatternCluster(
@@ -255,35 +649,60 @@ class PatternAnalyzer:
     def extract_pattern_signature(self, cluster: PatternCluster) -> PatternSignature:
         """
         Extract pattern signature from cluster
+        
+        Computed once per cluster; repeated calls (check_novelty, approach
+        creation) return the same PatternSignature.
         """
+        if cluster._signature is None:
+            cluster._signature = self._build_pattern_signature(cluster)
+        return cluster._signature
+    
+    def _build_pattern_signature(self, cluster: PatternCluster) -> PatternSignature:
+        """Aggregate a cluster's records into a pattern signature"""
         records = cluster.records
         
-        # Aggregate domain weights
+        # Aggregate everything in one pass over the records
         domain_weights = {}
+        complexity_min = complexity_max = records[0].task_context.complexity
+        keyword_counts = Counter()
+        output_counts = Counter()
+        code_count = examples_count = theory_count = 0
+        
         for record in records:
-            for domain, weight in record.task_context.domain_weights.items():
-                domain_weights[domain] = domain_weights.get(domain, 0.0) + weight * record.actual_quality
+            task_context = record.task_context
+            
+            # Domain weights, weighted by quality
+            quality = record.actual_quality
+            for domain, weight in task_context.domain_weights.items():
+                domain_weights[domain] = domain_weights.get(domain, 0.0) + weight * quality
+            
+            # Complexity range
+            complexity = task_context.complexity
+            if complexity < complexity_min:
+                complexity_min = complexity
+            elif complexity > complexity_max:
+                complexity_max = complexity
+            
+            keyword_counts.update(task_context.keywords)
+            output_counts[task_context.output_type] += 1
+            
+            cf = record.content_features
+            if cf:
+                code_count += cf.has_code_blocks
+                examples_count += cf.example_ratio > 0.3
+                theory_count += cf.explanation_ratio > 0.4
         
         # Normalize
         total = sum(domain_weights.values())
         if total > 0:
             domain_weights = {d: w/total for d, w in domain_weights.items()}
         
-        # Complexity range
-        complexities = [r.task_context.complexity for r in records]
-        complexity_min = min(complexities)
-        complexity_max = max(complexities)
-        
         # Expand range slightly (10% on each side)
         range_span = complexity_max - complexity_min
         complexity_min = max(0.0, complexity_min - range_span * 0.1)
         complexity_max = min(1.0, complexity_max + range_span * 0.1)
         
         # Common keywords
-        keyword_counts = Counter()
-        for record in records:
-            keyword_counts.update(record.task_context.keywords)
-        
         top_keywords = [k for k, _ in keyword_counts.most_common(10)]
         keyword_weights = {
             k: count / len(records)
@@ -292,13 +711,12 @@ class PatternAnalyzer:
         }
         
         # Common output types
-        output_types = [r.task_context.output_type for r in records]
-        common_outputs = [ot for ot, _ in Counter(output_types).most_common(3)]
+        common_outputs = [ot for ot, _ in output_counts.most_common(3)]
         
         # Boolean characteristics (>50% of records)
-        has_code = sum(1 for r in records if r.content_features and r.content_features.has_code_blocks) / len(records) > 0.5
-        has_examples = sum(1 for r in records if r.content_features and r.content_features.example_ratio > 0.3) / len(records) > 0.5
-        has_theory = sum(1 for r in records if r.content_features and r.content_features.explanation_ratio > 0.4) / len(records) > 0.5
+        has_code = code_count / len(records) > 0.5
+        has_examples = examples_count / len(records) > 0.5
+        has_theory = theory_count / len(records) > 0.5
         
         return PatternSignature(
             domain_weights=domain_weights,
@@ -315,7 +733,16 @@ class PatternAnalyzer:
     def extract_style_characteristics(self, cluster: PatternCluster) -> StyleCharacteristics:
         """
         Extract style characteristics from cluster
+        
+        Computed once per cluster; repeated calls return the same
+        StyleCharacteristics.
         """
+        if cluster._style is None:
+            cluster._style = self._build_style_characteristics(cluster)
+        return cluster._style
+    
+    def _build_style_characteristics(self, cluster: PatternCluster) -> StyleCharacteristics:
+        """Aggregate a cluster's content features into style characteristics"""
         records = cluster.records
         
         # Filter records with content features
@@ -324,33 +751,60 @@ class PatternAnalyzer:
             # Return default style
             return self._default_style()
         
-        # Structure type (most common)
-        structure_types = []
+        # Tally categories, ranges and totals in one pass
+        structure_counts = {}
+        tone_counts = {}
+        section_min = section_max = records_with_features[0].content_features.section_count
+        formality_total = length_total = explanation_total = example_total = code_total = 0
+        headers_count = bullets_count = numbered_count = tables_count = 0
+        
         for record in records_with_features:
-            structure = self.content_analyzer.analyze_structure_type("")
-            # Infer from features
-            if record.content_features.has_numbered_list:
-                structure_types.append("sequential_steps")
-            elif record.content_features.has_bullets:
-                structure_types.append("bulleted")
-            elif record.content_features.section_count >= 4:
-                structure_types.append("hierarchical")
+            cf = record.content_features
+            
+            # Structure type (inferred from features)
+            if cf.has_numbered_list:
+                structure = "sequential_steps"
+            elif cf.has_bullets:
+                structure = "bulleted"
+            elif cf.section_count >= 4:
+                structure = "hierarchical"
             else:
-                structure_types.append("prose")
+                structure = "prose"
+            structure_counts[structure] = structure_counts.get(structure, 0) + 1
+            
+            tone_counts[cf.detected_tone] = tone_counts.get(cf.detected_tone, 0) + 1
+            
+            # Section count range
+            if cf.section_count < section_min:
+                section_min = cf.section_count
+            elif cf.section_count > section_max:
+                section_max = cf.section_count
+            
+            formality_total += cf.formality_score
+            length_total += cf.total_length
+            explanation_total += cf.explanation_ratio
+            example_total += cf.example_ratio
+            code_total += cf.code_ratio
+            
+            headers_count += cf.section_count > 1
+            bullets_count += cf.has_bullets
+            numbered_count += cf.has_numbered_list
+            tables_count += cf.has_tables
         
-        structure_type = Counter(structure_types).most_common(1)[0][0] if structure_types else "prose"
+        count = len(records_with_features)
+        
+        # Structure type (most common, first seen wins ties)
+        structure_type = max(structure_counts, key=structure_counts.get)
         
         # Section count range
-        section_counts = [r.content_features.section_count for r in records_with_features]
-        section_min = int(min(section_counts))
-        section_max = int(max(section_counts))
+        section_min = int(section_min)
+        section_max = int(section_max)
         
         # Tone (most common detected tone)
-        tones = [r.content_features.detected_tone for r in records_with_features]
-        tone = Counter(tones).most_common(1)[0][0]
+        tone = max(tone_counts, key=tone_counts.get)
         
         # Voice (heuristic based on formality)
-        avg_formality = sum(r.content_features.formality_score for r in records_with_features) / len(records_with_features)
+        avg_formality = formality_total / count
         if avg_formality > 0.7:
             voice = "third_person"
         elif avg_formality < 0.3:
@@ -359,7 +813,7 @@ class PatternAnalyzer:
             voice = "second_person"
         
         # Depth level
-        avg_length = sum(r.content_features.total_length for r in records_with_features) / len(records_with_features)
+        avg_length = length_total / count
         if avg_length < 1000:
             depth_level = "concise"
         elif avg_length < 3000:
@@ -370,8 +824,8 @@ class PatternAnalyzer:
             depth_level = "exhaustive"
         
         # Explanation style
-        avg_explanation = sum(r.content_features.explanation_ratio for r in records_with_features) / len(records_with_features)
-        avg_example = sum(r.content_features.example_ratio for r in records_with_features) / len(records_with_features)
+        avg_explanation = explanation_total / count
+        avg_example = example_total / count
         
         if avg_explanation > 0.6:
             explanation_style = "conceptual"
@@ -389,7 +843,7 @@ class PatternAnalyzer:
             example_density = "high"
         
         # Code style
-        avg_code = sum(r.content_features.code_ratio for r in records_with_features) / len(records_with_features)
+        avg_code = code_total / count
         if avg_code < 0.05:
             code_style = None
         elif avg_code < 0.2:
@@ -400,10 +854,10 @@ class PatternAnalyzer:
             code_style = "production"
         
         # Organization elements (>50% have feature)
-        use_headers = sum(1 for r in records_with_features if r.content_features.section_count > 1) / len(records_with_features) > 0.5
-        use_bullets = sum(1 for r in records_with_features if r.content_features.has_bullets) / len(records_with_features) > 0.5
-        use_numbered_lists = sum(1 for r in records_with_features if r.content_features.has_numbered_list) / len(records_with_features) > 0.5
-        use_tables = sum(1 for r in records_with_features if r.content_features.has_tables) / len(records_with_features) > 0.5
+        use_headers = headers_count / count > 0.5
+        use_bullets = bullets_count / count > 0.5
+        use_numbered_lists = numbered_count / count > 0.5
+        use_tables = tables_count / count > 0.5
         
         return StyleCharacteristics(
             structure_type=structure_type,
@@ -449,14 +903,20 @@ class PatternAnalyzer:
         """Save discovered patterns to file"""
         patterns_file = self.patterns_path / "discovered_patterns.json"
         
-        data = {
-            'discovered_at': datetime.now().isoformat(),
-            'cluster_count': len(clusters),
-            'clusters': [c.to_dict() for c in clusters]
-        }
-        
-        with open(patterns_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        # Stream one cluster at a time instead of building the whole document;
+        # the layout matches a 2-space indented dump of the full structure
+        with open(patterns_file, 'wb') as f:
+            f.write(b'{\n  "discovered_at": ' + json_codec.dumps(datetime.now().isoformat()))
+            f.write(b',\n  "cluster_count": ' + json_codec.dumps(len(clusters)))
+            if not clusters:
+                f.write(b',\n  "clusters": []\n}')
+                return
+            
+            f.write(b',\n  "clusters": [')
+            for i, cluster in enumerate(clusters):
+                lines = json_codec.dumps(cluster.to_dict(), indent=True).split(b'\n')
+                f.write((b',\n    ' if i else b'\n    ') + b'\n    '.join(lines))
+            f.write(b'\n  ]\n}')
     
     def check_novelty(
         self,
@@ -506,15 +966,15 @@ class PatternAnalyzer:
         scores.append(complexity_sim)
         
         # Keyword overlap
-        keywords1 = set(sig1.keyword_patterns)
-        keywords2 = set(sig2.keyword_patterns)
+        keywords1 = sig1.keyword_set
+        keywords2 = sig2.keyword_set
         if keywords1 or keywords2:
             keyword_sim = len(keywords1 & keywords2) / len(keywords1 | keywords2)
             scores.append(keyword_sim)
         
         # Output type overlap
-        outputs1 = set(sig1.output_types)
-        outputs2 = set(sig2.output_types)
+        outputs1 = sig1.output_type_set
+        outputs2 = sig2.output_type_set
         if outputs1 or outputs2:
             output_sim = len(outputs1 & outputs2) / len(outputs1 | outputs2)
             scores.append(output_sim)
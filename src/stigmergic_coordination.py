@@ -3,16 +3,81 @@ Stigmergic Coordination System
 Agents coordinate through shared environment modification
 """
 
+import os
+import sys
+import mmap
 import time
-import json
 import math
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+import atexit
+import weakref
+import logging
+import random
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass
 from pathlib import Path
 from collections import defaultdict
+from contextlib import contextmanager
 import threading
+import numpy as np
+from src import json_codec
 
-@dataclass
+try:
+    import msgpack
+except ImportError:  # Optional dependency
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Slotted Signal records (slots= requires Python 3.10+)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Bound once: used for every signal decay evaluation
+_exp = math.exp
+
+# Snapshot files: compact MessagePack when msgpack is installed, JSON otherwise
+SNAPSHOT_MSGPACK = "signals.msgpack"
+SNAPSHOT_JSON = "signals.json"
+
+# Snapshots at least this large are decoded straight from an mmap of the file
+SNAPSHOT_MMAP_MIN_SIZE = 1024 * 1024
+
+# Journaled mutations between compactions of the signals snapshot
+JOURNAL_COMPACT_EVERY = 1000
+
+# Seconds between background writes of pending journal entries
+FLUSH_INTERVAL = 0.5
+
+# Seconds a read_signals / get_board_state result is reused while the board
+# is unchanged (decayed strengths and ages drift only slightly meanwhile)
+READ_CACHE_TTL = 1.0
+
+# Lock shards guarding the board; each task is guarded by one shard
+LOCK_SHARDS = 16
+
+# Open boards, closed at exit (held weakly, so the hook keeps none alive)
+_open_boards = weakref.WeakSet()
+
+
+def _close_open_boards():
+    """Fold the journals of boards still open at exit into their snapshots"""
+    for board in list(_open_boards):
+        board.close()
+
+
+atexit.register(_close_open_boards)
+
+
+def _write_pending(journal_path: Path, pending: List[bytes]):
+    """Append queued journal lines of a board collected without close()"""
+    if pending:
+        pending.append(b'')
+        with open(journal_path, 'ab') as f:
+            f.write(b'\n'.join(pending))
+        pending.clear()
+
+@dataclass(**_SLOTS)
 class Signal:
     """A signal deposited on the stigmergic board"""
     task_id: str
@@ -28,9 +93,184 @@ class Signal:
     
     def decayed_strength(self, decay_rate: float) -> float:
         """Calculate current strength after decay"""
-        age_seconds = self.age()
-        decay_factor = math.exp(-age_seconds / decay_rate)
-        return self.strength * decay_factor
+        return self.decayed_strength_at(time.time(), 1.0 / decay_rate)
+    
+    def decayed_strength_at(self, now: float, inv_decay: float) -> float:
+        """
+        Calculate strength after decay at a given time
+        
+        Args:
+            now: Time to evaluate at (seconds since epoch)
+            inv_decay: Reciprocal of the board's decay rate
+            
+        Returns:
+            Decayed signal strength
+        """
+        return self.strength * _exp((self.timestamp - now) * inv_decay)
+    
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        return {
+            'task_id': self.task_id,
+            'approach': self.approach,
+            'strength': self.strength,
+            'timestamp': self.timestamp,
+            'deposited_by': self.deposited_by,
+            'success_metric': self.success_metric
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Signal':
+        """Create from dictionary"""
+        return cls(**data)
+
+
+def _decayed(strength: np.ndarray, timestamp: np.ndarray, now: float, inv_decay: float) -> np.ndarray:
+    """strength * exp((timestamp - now) * inv_decay), evaluated in place in one scratch array"""
+    current = np.subtract(timestamp, now)
+    current *= inv_decay
+    np.exp(current, out=current)
+    current *= strength
+    return current
+
+
+def _read_dicts(rows: Tuple[tuple, ...]) -> List[Dict[str, Any]]:
+    """Fresh read_signals dicts from cached (approach, strength, success, age, from_self) rows"""
+    return [
+        {
+            "approach": approach,
+            "strength": strength,
+            "success_metric": success,
+            "age_hours": age_hours,
+            "from_self": from_self
+        }
+        for approach, strength, success, age_hours, from_self in rows
+    ]
+
+
+def _board_state_dict(total_signals: int, tasks: Dict[str, Tuple[tuple, ...]]) -> Dict[str, Any]:
+    """Fresh get_board_state dict from cached (approach, strength, age) rows per task"""
+    return {
+        "total_tasks": len(tasks),
+        "total_signals": total_signals,
+        "tasks": {
+            task_id: [
+                {
+                    "approach": approach,
+                    "strength": strength,
+                    "age_hours": age_hours
+                }
+                for approach, strength, age_hours in rows
+            ]
+            for task_id, rows in tasks.items()
+        }
+    }
+
+
+class SignalColumns:
+    """
+    One task's signals stored column-wise (struct of arrays)
+    
+    Rows [0, size) are live. The arrays grow geometrically, so appends are
+    amortized O(1), and decay is evaluated for all rows in one NumPy call.
+    """
+    
+    __slots__ = ('size', 'rows', 'reads', 'strength', 'timestamp', 'success_metric', 'approach', 'deposited_by')
+    
+    _NUMERIC = ('strength', 'timestamp', 'success_metric')
+    _TEXT = ('approach', 'deposited_by')
+    
+    def __init__(self, capacity: int = 4):
+        self.size = 0
+        self.rows: Dict[str, int] = {}  # approach -> row
+        self.reads: Dict[str, Tuple[float, tuple]] = {}  # agent -> (time, read_signals rows)
+        self.strength = np.empty(capacity)
+        self.timestamp = np.empty(capacity)
+        self.success_metric = np.empty(capacity)
+        self.approach = np.empty(capacity, dtype=object)
+        self.deposited_by = np.empty(capacity, dtype=object)
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    @classmethod
+    def from_columns(cls, data: Dict[str, list]) -> 'SignalColumns':
+        """Build columns in bulk from to_columns() lists"""
+        n = len(data['approach'])
+        columns = cls(max(n, 4))
+        for name in cls._TEXT + cls._NUMERIC:
+            getattr(columns, name)[:n] = data[name]
+        columns.size = n
+        columns.rows = {name: row for row, name in enumerate(data['approach'])}
+        return columns
+    
+    def find(self, approach: str) -> int:
+        """Row of an approach, or -1 if it has no signal"""
+        return self.rows.get(approach, -1)
+    
+    def append(self, signal: Signal) -> int:
+        """Add a signal as a new row and return its index"""
+        if self.size == len(self.strength):
+            self._grow()
+        
+        row = self.size
+        self.size += 1
+        self.set_row(row, signal)
+        self.rows[signal.approach] = row
+        return row
+    
+    def set_row(self, row: int, signal: Signal):
+        """Overwrite a row with the fields of a signal"""
+        self.reads.clear()
+        self.approach[row] = signal.approach
+        self.deposited_by[row] = signal.deposited_by
+        self.strength[row] = signal.strength
+        self.timestamp[row] = signal.timestamp
+        self.success_metric[row] = signal.success_metric
+    
+    def signal(self, task_id: str, row: int) -> Signal:
+        """Materialize a row as a Signal"""
+        return Signal(
+            task_id=task_id,
+            approach=self.approach[row],
+            strength=float(self.strength[row]),
+            timestamp=float(self.timestamp[row]),
+            deposited_by=self.deposited_by[row],
+            success_metric=float(self.success_metric[row])
+        )
+    
+    def to_columns(self) -> Dict[str, list]:
+        """Live rows as one list per field (the snapshot layout)"""
+        n = self.size
+        return {name: getattr(self, name)[:n].tolist() for name in self._TEXT + self._NUMERIC}
+    
+    def decayed(self, now: float, inv_decay: float) -> np.ndarray:
+        """Current (decayed) strength of every live row"""
+        n = self.size
+        return _decayed(self.strength[:n], self.timestamp[:n], now, inv_decay)
+    
+    def keep(self, mask: np.ndarray):
+        """Compact the live rows to those selected by a boolean mask"""
+        self.reads.clear()
+        n = self.size
+        kept = int(np.count_nonzero(mask))
+        for name in self._NUMERIC + self._TEXT:
+            column = getattr(self, name)
+            column[:kept] = column[:n][mask]
+        for name in self._TEXT:
+            # Drop references held by the vacated rows
+            getattr(self, name)[kept:n] = None
+        self.size = kept
+        self.rows = {approach: row for row, approach in enumerate(self.approach[:kept].tolist())}
+    
+    def _grow(self):
+        """Double the capacity of every column"""
+        n = self.size
+        for name in self._NUMERIC + self._TEXT:
+            old = getattr(self, name)
+            new = np.empty(max(2 * len(old), 4), dtype=old.dtype)
+            new[:n] = old[:n]
+            setattr(self, name, new)
 
 
 class StigmergicBoard:
@@ -46,19 +286,45 @@ class StigmergicBoard:
         storage_path: str = "data/stigmergy"
     ):
         self.decay_rate = decay_rate
+        self._inv_decay = 1.0 / decay_rate
         self.amplification_factor = amplification_factor
         self.attenuation_factor = attenuation_factor
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
         
-        # task_id -> List[Signal]
-        self.signals: Dict[str, List[Signal]] = defaultdict(list)
-        self.lock = threading.Lock()
+        # task_id -> that task's signals, column-wise
+        self.signals: Dict[str, SignalColumns] = defaultdict(SignalColumns)
+        
+        # Per-task operations take only their task's shard; board-wide ones
+        # take every shard in index order. Order: shards, then the flush
+        # lock, then the journal lock.
+        self._shards = [threading.Lock() for _ in range(LOCK_SHARDS)]
+        self._flush_lock = threading.Lock()
+        self._journal_lock = threading.Lock()
+        
+        # Mutations are queued in memory, appended to a journal by a
+        # background flusher and folded into the snapshot every
+        # JOURNAL_COMPACT_EVERY entries
+        self._journal_path = self.storage_path / "signals.jsonl"
+        self._journal = None
+        self._journal_entries = 0
+        self._pending: List[bytes] = []
+        
+        # Bumped on every mutation; keys the cached board state
+        self._generation = 0
+        self._board_state_cache = None
         
         self._load_signals()
         
-        # Start decay background thread
-        self._start_decay_thread()
+        # Fold the journal into the snapshot on exit; a board collected
+        # without close() still writes its queued entries
+        _open_boards.add(self)
+        self._finalizer = weakref.finalize(self, _write_pending, self._journal_path, self._pending)
+        self._finalizer.atexit = False
+        
+        # Start flush background thread (signals decay lazily, see read_signals)
+        self._flush_stop = threading.Event()
+        self._start_flush_thread()
     
     def deposit_signal(
         self,
@@ -76,79 +342,145 @@ class StigmergicBoard:
             success_metric: Quality/success measure (0.0 to 1.0)
             agent_id: ID of depositing agent
         """
-        with self.lock:
-            # Calculate initial signal strength from success
-            initial_strength = success_metric * 100.0
-            
-            # Check for existing signals for this task/approach
-            existing_signal = None
-            for signal in self.signals[task_id]:
-                if signal.approach == approach:
-                    existing_signal = signal
-                    break
+        with self._lock_for(task_id):
+            self._append_journal(self._deposit_unlocked(task_id, approach, success_metric, agent_id, time.time()))
+    
+    def deposit_signals(self, entries: List[Tuple[str, str, float, str]]):
+        """
+        Deposit several signals at once
+        
+        Takes the lock shards of all involved tasks once and queues their
+        journal entries together, instead of once per signal.
+        
+        Args:
+            entries: (task_id, approach, success_metric, agent_id) tuples,
+                applied in order
+        """
+        shards = sorted({self._shard_index(entry[0]) for entry in entries})
+        for shard in shards:
+            self._shards[shard].acquire()
+        try:
+            now = time.time()
+            journal = []
+            for task_id, approach, success_metric, agent_id in entries:
+                journal.extend(self._deposit_unlocked(task_id, approach, success_metric, agent_id, now))
+            self._append_journal(journal)
+        finally:
+            for shard in reversed(shards):
+                self._shards[shard].release()
+    
+    def _deposit_unlocked(
+        self,
+        task_id: str,
+        approach: str,
+        success_metric: float,
+        agent_id: str,
+        now: float
+    ) -> List[Dict[str, Any]]:
+        """Apply one deposit (caller holds the task's shard) and return its journal entries"""
+        journal = []
+        
+        # Calculate initial signal strength from success
+        initial_strength = success_metric * 100.0
+        
+        # Check for existing signals for this task/approach
+        columns = self.signals[task_id]
+        row = columns.find(approach)
+        
+        if row >= 0:
+            existing_signal = columns.signal(task_id, row)
+            current_strength = existing_signal.decayed_strength_at(now, self._inv_decay)
             
-            if existing_signal:
-                # Same approach exists - reinforce or attenuate
-                current_strength = existing_signal.decayed_strength(self.decay_rate)
-                
-                if existing_signal.deposited_by == agent_id or success_metric > 0.7:
-                    # Reinforce: Same agent or high success
-                    new_strength = current_strength + (initial_strength * self.amplification_factor)
-                    print(f"  ✓ Amplifying signal for '{approach}': {current_strength:.1f} → {new_strength:.1f}")
-                else:
-                    # Attenuate: Different agent with modest success
-                    new_strength = current_strength * self.attenuation_factor
-                    print(f"  ✓ Attenuating signal for '{approach}': {current_strength:.1f} → {new_strength:.1f}")
-                
-                # Update existing signal
-                existing_signal.strength = min(new_strength, 100.0)
-                existing_signal.timestamp = time.time()
-                existing_signal.success_metric = (
-                    existing_signal.success_metric * 0.7 + success_metric * 0.3
-                )
+            # Lazy decay: a signal that has decayed away is pruned, and the
+            # deposit starts a fresh one
+            if current_strength <= 1.0:
+                alive = np.ones(columns.size, dtype=bool)
+                alive[row] = False
+                journal.append(self._prune_unlocked(task_id, columns, alive))
+                columns = self.signals[task_id]
+                row = -1
+        
+        if row >= 0:
+            # Same approach exists - reinforce or attenuate
+            if existing_signal.deposited_by == agent_id or success_metric > 0.7:
+                # Reinforce: Same agent or high success
+                new_strength = current_strength + (initial_strength * self.amplification_factor)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("  ✓ Amplifying signal for '%s': %.1f → %.1f", approach, current_strength, new_strength)
             else:
-                # New approach - create signal
-                signal = Signal(
-                    task_id=task_id,
-                    approach=approach,
-                    strength=initial_strength,
-                    timestamp=time.time(),
-                    deposited_by=agent_id,
-                    success_metric=success_metric
-                )
-                self.signals[task_id].append(signal)
-                print(f"  ✓ New signal deposited for '{approach}': {initial_strength:.1f}")
+                # Attenuate: Different agent with modest success
+                new_strength = current_strength * self.attenuation_factor
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("  ✓ Attenuating signal for '%s': %.1f → %.1f", approach, current_strength, new_strength)
             
-            self._save_signals()
+            # Update existing signal
+            existing_signal.strength = min(new_strength, 100.0)
+            existing_signal.timestamp = now
+            existing_signal.success_metric = (
+                existing_signal.success_metric * 0.7 + success_metric * 0.3
+            )
+            signal = existing_signal
+            columns.set_row(row, signal)
+        else:
+            # New approach - create signal
+            signal = Signal(
+                task_id=task_id,
+                approach=approach,
+                strength=initial_strength,
+                timestamp=now,
+                deposited_by=agent_id,
+                success_metric=success_metric
+            )
+            columns.append(signal)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("  ✓ New signal deposited for '%s': %.1f", approach, initial_strength)
+        
+        journal.append({"op": "upsert", "task": task_id, "sig": signal.to_dict()})
+        return journal
     
     def read_signals(self, task_id: str, agent_id: str) -> List[Dict[str, Any]]:
         """
         Agent reads signals for a task
         
         Returns:
-            List of signals with current (decayed) strengths
+            List of signals with current (decayed) strengths; reads repeated
+            within READ_CACHE_TTL of an unchanged task reuse the computed values
         """
-        with self.lock:
+        with self._lock_for(task_id):
             if task_id not in self.signals:
                 return []
             
-            # Calculate current strengths after decay
-            signal_data = []
-            for signal in self.signals[task_id]:
-                current_strength = signal.decayed_strength(self.decay_rate)
-                if current_strength > 1.0:  # Only include non-negligible signals
-                    signal_data.append({
-                        "approach": signal.approach,
-                        "strength": current_strength,
-                        "success_metric": signal.success_metric,
-                        "age_hours": signal.age() / 3600.0,
-                        "from_self": signal.deposited_by == agent_id
-                    })
+            columns = self.signals[task_id]
+            now = time.time()
+            cached = columns.reads.get(agent_id)
+            if cached is not None and 0.0 <= now - cached[0] < READ_CACHE_TTL:
+                return _read_dicts(cached[1])
             
-            # Sort by strength
-            signal_data.sort(key=lambda x: x['strength'], reverse=True)
+            # Calculate current strengths after decay (one clock read per call)
+            current = columns.decayed(now, self._inv_decay)
             
-            return signal_data
+            # Lazy decay: drop negligible signals while their strengths are at hand
+            alive = current > 1.0
+            if not alive.all():
+                self._append_journal([self._prune_unlocked(task_id, columns, alive)])
+                if not columns.size:
+                    return []
+                current = current[alive]
+            
+            # Strongest first
+            rows = np.argsort(-current, kind='stable')
+            
+            # Cached as immutable rows; every caller gets its own dicts
+            signal_rows = tuple(zip(
+                columns.approach[rows].tolist(),
+                current[rows].tolist(),
+                columns.success_metric[rows].tolist(),
+                ((now - columns.timestamp[rows]) / 3600.0).tolist(),
+                (columns.deposited_by[rows] == agent_id).tolist()
+            ))
+            columns.reads[agent_id] = (now, signal_rows)
+            
+            return _read_dicts(signal_rows)
     
     def strongest_signal(self, task_id: str) -> Optional[str]:
         """Get approach with strongest signal for task"""
@@ -158,75 +490,293 @@ class StigmergicBoard:
         return signals[0]['approach']
     
     def decay_signals(self):
-        """Remove signals that have decayed to negligible strength"""
-        with self.lock:
-            for task_id in list(self.signals.keys()):
-                # Filter out weak signals
-                self.signals[task_id] = [
-                    s for s in self.signals[task_id]
-                    if s.decayed_strength(self.decay_rate) > 1.0
-                ]
-                
-                # Remove empty task entries
-                if not self.signals[task_id]:
-                    del self.signals[task_id]
-            
-            self._save_signals()
+        """
+        Remove signals that have decayed to negligible strength
+        
+        Reads prune their own task and compaction prunes the whole board, so
+        this only needs calling to reclaim memory of tasks nobody reads.
+        """
+        with self._all_shards():
+            entries = self._decay_unlocked()
+            if entries:
+                self._append_journal(entries)
+    
+    def _decay_unlocked(self) -> List[Dict[str, Any]]:
+        """Prune every task (caller holds all shards); returns the prune journal entries"""
+        now = time.time()
+        inv_decay = self._inv_decay
+        entries = []
+        for task_id in list(self.signals.keys()):
+            # Filter out weak signals
+            columns = self.signals[task_id]
+            alive = columns.decayed(now, inv_decay) > 1.0
+            if not alive.all():
+                entries.append(self._prune_unlocked(task_id, columns, alive))
+        return entries
+    
+    def _prune_unlocked(self, task_id: str, columns: SignalColumns, alive: np.ndarray) -> Dict[str, Any]:
+        """Keep only a task's alive rows (caller holds its shard); returns the prune journal entry"""
+        pruned = columns.approach[:columns.size][~alive].tolist()
+        columns.keep(alive)
+        
+        # Remove empty task entries
+        if not columns.size:
+            del self.signals[task_id]
+        
+        return {"op": "prune", "task": task_id, "approaches": pruned}
     
     def get_board_state(self) -> Dict[str, Any]:
-        """Get current state of the board"""
-        with self.lock:
-            return {
-                "total_tasks": len(self.signals),
-                "total_signals": sum(len(sigs) for sigs in self.signals.values()),
-                "tasks": {
-                    task_id: [
-                        {
-                            "approach": sig.approach,
-                            "strength": sig.decayed_strength(self.decay_rate),
-                            "age_hours": sig.age() / 3600.0
-                        }
-                        for sig in signals
-                    ]
-                    for task_id, signals in self.signals.items()
-                }
-            }
+        """Get current state of the board (reused within READ_CACHE_TTL while unchanged)"""
+        with self._all_shards():
+            now = time.time()
+            generation = self._generation
+            cached = self._board_state_cache
+            reuse = (cached is not None and cached[0] == generation
+                     and 0.0 <= now - cached[1] < READ_CACHE_TTL)
+            
+            # Only copy the columns out while every shard is held; the decay
+            # math and the dict building below run without blocking deposits
+            if not reuse:
+                tasks = [(task_id, columns.size) for task_id, columns in self.signals.items()]
+                if tasks:
+                    timestamp_col = np.concatenate([columns.timestamp[:columns.size] for columns in self.signals.values()])
+                    strength_col = np.concatenate([columns.strength[:columns.size] for columns in self.signals.values()])
+                    approach_col = np.concatenate([columns.approach[:columns.size] for columns in self.signals.values()])
+        
+        if reuse:
+            return _board_state_dict(cached[2], cached[3])
+        
+        # Decay every signal on the board in one pass over the concatenated
+        # columns, then slice the results back out per task
+        ends = list(accumulate(size for _, size in tasks))
+        if tasks:
+            approaches = approach_col.tolist()
+            strengths = _decayed(strength_col, timestamp_col, now, self._inv_decay).tolist()
+            ages = ((now - timestamp_col) / 3600.0).tolist()
+        
+        total_signals = ends[-1] if ends else 0
+        task_rows = {
+            task_id: tuple(zip(
+                approaches[end - size:end],
+                strengths[end - size:end],
+                ages[end - size:end]
+            ))
+            for (task_id, size), end in zip(tasks, ends)
+        }
+        # Keyed by the generation copied out, so a mutation made meanwhile
+        # simply invalidates it; cached as immutable rows, built into fresh
+        # dicts for every caller
+        self._board_state_cache = (generation, now, total_signals, task_rows)
+        
+        return _board_state_dict(total_signals, task_rows)
     
-    def _start_decay_thread(self):
-        """Start background thread for signal decay"""
-        def decay_loop():
-            while True:
-                time.sleep(600)  # Every 10 minutes
-                self.decay_signals()
+    def _start_flush_thread(self):
+        """Start background thread writing queued mutations to the journal"""
+        # Holds the board weakly: the thread ends on close() or once the
+        # board is collected
+        board_ref = weakref.ref(self)
+        stop = self._flush_stop
+        
+        def flush_loop():
+            while not stop.wait(FLUSH_INTERVAL):
+                board = board_ref()
+                if board is None:
+                    return
+                board.flush()
+                board._maybe_compact_journal()
+                del board
         
-        thread = threading.Thread(target=decay_loop, daemon=True)
-        thread.start()
+        self._flush_thread = threading.Thread(target=flush_loop, daemon=True)
+        self._flush_thread.start()
+    
+    def flush(self):
+        """Append queued mutations to the journal in a single write"""
+        with self._flush_lock:
+            with self._journal_lock:
+                if not self._pending:
+                    return
+                # Drained in place: the finalizer holds this list
+                pending = self._pending[:]
+                self._pending.clear()
+            
+            # Written outside the journal lock so deposits never wait on disk
+            if self._journal is None:
+                self._journal = open(self._journal_path, 'ab', buffering=0)
+            pending.append(b'')
+            self._journal.write(b'\n'.join(pending))
+    
+    def close(self):
+        """
+        Stop the flusher, compact the journal into the snapshot and release the journal handle
+        
+        Deposits made after close() are persisted by the next flush() or close().
+        """
+        _open_boards.discard(self)
+        self._finalizer.detach()
+        
+        self._flush_stop.set()
+        if self._flush_thread is not threading.current_thread():
+            self._flush_thread.join()
+        
+        with self._all_shards():
+            if self._pending or self._journal is not None or self._journal_path.exists():
+                self._compact_journal()
+    
+    @staticmethod
+    def _shard_index(task_id: str) -> int:
+        """Index of the lock shard guarding a task"""
+        return hash(task_id) % LOCK_SHARDS
+    
+    def _lock_for(self, task_id: str) -> threading.Lock:
+        """Lock shard guarding a task"""
+        return self._shards[self._shard_index(task_id)]
+    
+    @contextmanager
+    def _all_shards(self):
+        """Hold every lock shard (acquired in index order to avoid deadlock)"""
+        for lock in self._shards:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._shards):
+                lock.release()
+    
+    def _append_journal(self, entries: List[Dict[str, Any]]):
+        """Queue mutations for the journal (caller holds the tasks' shards)"""
+        lines = [json_codec.dumps(entry) for entry in entries]
+        with self._journal_lock:
+            self._pending.extend(lines)
+            self._journal_entries += len(lines)
+            self._generation += 1
+    
+    def _maybe_compact_journal(self):
+        """Compact once the journal is long enough (caller holds no shard)"""
+        if self._journal_entries < JOURNAL_COMPACT_EVERY:
+            return
+        
+        with self._all_shards():
+            # Another thread may have compacted while we waited
+            if self._journal_entries >= JOURNAL_COMPACT_EVERY:
+                self._compact_journal()
+    
+    def _compact_journal(self):
+        """Write a fresh snapshot and truncate the journal (caller holds all shards)"""
+        # Dead signals are left out of the snapshot; it supersedes their prune entries
+        self._decay_unlocked()
+        self._save_signals()
+        
+        # The snapshot covers queued entries too; holding the flush lock keeps
+        # a concurrent flush from writing them into the fresh journal
+        with self._flush_lock, self._journal_lock:
+            self._pending.clear()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            # Replaying entries already in the snapshot is harmless, so a crash
+            # between the two steps loses nothing
+            self._journal_path.unlink(missing_ok=True)
+            self._journal_entries = 0
+            self._generation += 1
     
     def _save_signals(self):
         """Persist signals to storage"""
-        filepath = self.storage_path / "signals.json"
-        data = {
-            task_id: [asdict(sig) for sig in signals]
-            for task_id, signals in self.signals.items()
-        }
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Column-wise layout: {task_id: {field: [value per signal]}}
+        data = {task_id: columns.to_columns() for task_id, columns in self.signals.items()}
+        if msgpack is not None:
+            filepath = self.storage_path / SNAPSHOT_MSGPACK
+            payload = msgpack.packb(data, use_bin_type=True)
+        else:
+            filepath = self.storage_path / SNAPSHOT_JSON
+            payload = json_codec.dumps(data)
+        
+        temp_path = filepath.with_suffix('.tmp')
+        temp_path.write_bytes(payload)
+        os.replace(temp_path, filepath)
+        
+        if msgpack is not None:
+            # The JSON snapshot has been migrated (a MessagePack snapshot that
+            # cannot be read without msgpack is left in place for recovery)
+            (self.storage_path / SNAPSHOT_JSON).unlink(missing_ok=True)
     
     def _load_signals(self):
-        """Load signals from storage"""
-        filepath = self.storage_path / "signals.json"
-        if not filepath.exists():
-            return
-        
+        """Load signals from storage (snapshot, then journaled mutations)"""
+        msgpack_path = self.storage_path / SNAPSHOT_MSGPACK
+        json_path = self.storage_path / SNAPSHOT_JSON
         try:
-            with open(filepath, 'r') as f:
-                data = json.load(f)
-                for task_id, signal_list in data.items():
-                    self.signals[task_id] = [
-                        Signal(**sig_data) for sig_data in signal_list
-                    ]
+            if msgpack is not None and msgpack_path.exists() and not (
+                json_path.exists() and json_path.stat().st_mtime > msgpack_path.stat().st_mtime
+            ):
+                data = self._read_msgpack_snapshot(msgpack_path)
+                for task_id, fields in data.items():
+                    self.signals[task_id] = SignalColumns.from_columns(fields)
+            elif json_path.exists():
+                # JSON snapshot (also migrates boards saved before msgpack was installed)
+                data = json_codec.loads(json_path.read_bytes())
+                from_dict = Signal.from_dict
+                for task_id, fields in data.items():
+                    if isinstance(fields, dict):
+                        self.signals[task_id] = SignalColumns.from_columns(fields)
+                        continue
+                    
+                    # Original signals.json layout: one Signal dict per signal
+                    columns = SignalColumns(max(len(fields), 4))
+                    for sig_data in fields:
+                        columns.append(from_dict(sig_data))
+                    self.signals[task_id] = columns
+            elif msgpack_path.exists():
+                raise RuntimeError(f"msgpack is required to read {msgpack_path}")
         except Exception as e:
             print(f"Error loading signals: {e}")
+        
+        if self._journal_path.exists():
+            try:
+                self._replay_journal()
+            except Exception as e:
+                print(f"Error replaying signal journal: {e}")
+    
+    @staticmethod
+    def _read_msgpack_snapshot(filepath: Path) -> Any:
+        """Decode a MessagePack snapshot (large files are decoded from an mmap)"""
+        if filepath.stat().st_size < SNAPSHOT_MMAP_MIN_SIZE:
+            return msgpack.unpackb(filepath.read_bytes(), raw=False)
+        
+        # Decode from the page cache instead of first copying the file into bytes
+        with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return msgpack.unpackb(mm, raw=False)
+    
+    def _replay_journal(self):
+        """Apply journaled mutations, in order, on top of the loaded snapshot"""
+        with open(self._journal_path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json_codec.loads(line)
+                except ValueError:
+                    # Torn final line from an interrupted write
+                    continue
+                
+                task_id = entry["task"]
+                if entry["op"] == "upsert":
+                    sig = Signal.from_dict(entry["sig"])
+                    columns = self.signals[task_id]
+                    row = columns.find(sig.approach)
+                    if row >= 0:
+                        columns.set_row(row, sig)
+                    else:
+                        columns.append(sig)
+                elif entry["op"] == "prune" and task_id in self.signals:
+                    pruned = set(entry["approaches"])
+                    columns = self.signals[task_id]
+                    columns.keep(np.fromiter(
+                        (approach not in pruned for approach in columns.approach[:columns.size]),
+                        dtype=bool, count=columns.size
+                    ))
+                    if not columns.size:
+                        del self.signals[task_id]
+                
+                self._journal_entries += 1
 
 
 class StigmergicAgent:
@@ -237,44 +787,49 @@ class StigmergicAgent:
     def __init__(self, agent_id: str, board: StigmergicBoard):
         self.agent_id = agent_id
         self.board = board
+        
+        # Per-agent generator: concurrent agents don't share random's global instance
+        self._rng = random.Random()
     
-    def select_approach(self, task_id: str) -> str:
-        """Select approach based on board signals"""
-        signals = self.board.read_signals(task_id, self.agent_id)
+    def select_approach(self, task_id: str, signals: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Select approach based on board signals (read from the board unless given)"""
+        if signals is None:
+            signals = self.board.read_signals(task_id, self.agent_id)
         
         if not signals:
             # No signals - explore randomly
             approaches = ["approach_A", "approach_B", "approach_C"]
-            import random
-            return random.choice(approaches)
+            return self._rng.choice(approaches)
         
-        # Weight selection by signal strength
-        total_strength = sum(s['strength'] for s in signals)
+        # Weight selection by signal strength: first signal whose cumulative
+        # strength reaches the random draw
+        cumulative = list(accumulate(s['strength'] for s in signals))
+        rand = self._rng.uniform(0, cumulative[-1])
+        index = bisect_left(cumulative, rand)
         
-        import random
-        rand = random.uniform(0, total_strength)
-        cumulative = 0
-        
-        for signal in signals:
-            cumulative += signal['strength']
-            if rand <= cumulative:
-                return signal['approach']
+        if index < len(signals):
+            return signals[index]['approach']
         
         # Fallback to strongest
         return signals[0]['approach']
     
-    def execute_and_report(self, task_id: str):
-        """Execute task and report results to board"""
+    def execute(self, task_id: str) -> Tuple[str, float]:
+        """Execute task without reporting; returns (approach, success_metric)"""
         # Select approach based on signals
         approach = self.select_approach(task_id)
         print(f"\n{self.agent_id}: Selected '{approach}' for task '{task_id}'")
         
         # Simulate execution
-        import random
-        success_metric = random.uniform(0.5, 0.95)
+        success_metric = self._rng.uniform(0.5, 0.95)
+        print(f"{self.agent_id}: Execution complete (quality: {success_metric:.2f})")
+        
+        return approach, success_metric
+    
+    def execute_and_report(self, task_id: str):
+        """Execute task and report results to board"""
+        approach, success_metric = self.execute(task_id)
         
         # Deposit signal
-        print(f"{self.agent_id}: Execution complete (quality: {success_metric:.2f})")
         self.board.deposit_signal(task_id, approach, success_metric, self.agent_id)
         
         return approach, success_metric
@@ -286,6 +841,10 @@ if __name__ == "__main__":
     print("STIGMERGIC COORDINATION DEMO")
     print("=" * 60)
     
+    # Show the board's per-deposit reinforcement messages
+    logging.basicConfig(format="%(message)s")
+    logger.setLevel(logging.DEBUG)
+    
     # Create shared board
     board = StigmergicBoard(decay_rate=1800.0)  # 30 min decay
     
@@ -301,10 +860,17 @@ if __name__ == "__main__":
     for cycle in range(3):
         print(f"\n--- Cycle {cycle + 1} ---")
         
+        # Agents work from the signals left by previous cycles; the cycle's
+        # results are deposited together
+        results = []
         for agent in agents:
-            agent.execute_and_report(task_id)
+            approach, success_metric = agent.execute(task_id)
+            results.append((task_id, approach, success_metric, agent.agent_id))
             time.sleep(0.1)  # Small delay for readability
         
+        print()
+        board.deposit_signals(results)
+        
         # Show board state
         print("\nBoard State:")
         state = board.get_board_state()
@@ -315,4 +881,4 @@ if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("FINAL BOARD STATE")
     print("=" * 60)
-    print(json.dumps(board.get_board_state(), indent=2))
+    print(json_codec.dumps(board.get_board_state(), indent=True).decode('utf-8'))
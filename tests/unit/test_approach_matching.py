@@ -0,0 +1,83 @@
+"""
+Unit tests for approach matching
+Tests the vectorized signature index against the scalar match score
+"""
+
+import random
+import pytest
+from src.approach_patterns import PatternSignature, TaskContext
+from src.approach_matching import SignatureIndex, calculate_match_score
+
+DOMAINS = ['writing', 'coding', 'analysis', 'research', 'design']
+KEYWORDS = ['python', 'tutorial', 'guide', 'api', 'data', 'testing', 'deploy', 'docs']
+OUTPUT_TYPES = ['tutorial', 'guide', 'reference', 'report']
+
+
+def random_signature(rng):
+    """Build a signature with random domains, complexity range, keywords and output types"""
+    low = rng.random()
+    return PatternSignature(
+        domain_weights={d: rng.random() for d in rng.sample(DOMAINS, rng.randint(0, 3))},
+        complexity_min=low,
+        complexity_max=min(1.0, low + rng.random() * 0.5),
+        keyword_patterns=[],
+        keyword_weights={kw.title(): rng.random() for kw in rng.sample(KEYWORDS, rng.randint(0, 4))},
+        output_types=rng.sample(OUTPUT_TYPES, rng.randint(0, 2)),
+        requires_code=False,
+        requires_examples=False,
+        requires_theory=False
+    )
+
+
+def random_task(rng):
+    """Build a task, including domains, keywords and output types no signature uses"""
+    return TaskContext(
+        prompt="",
+        domain_weights={d: rng.random() for d in rng.sample(DOMAINS + ['music'], rng.randint(0, 3))},
+        complexity=rng.random(),
+        keywords=rng.sample(KEYWORDS + ['pythonic', 'misc'], rng.randint(0, 4)),
+        output_type=rng.choice(OUTPUT_TYPES + ['poem']),
+        estimated_duration=1.0
+    )
+
+
+class TestSignatureIndex:
+    """Tests for SignatureIndex.match"""
+
+    @pytest.mark.parametrize("threshold", [0.0, 0.3, 0.5, 0.7])
+    def test_matches_scalar_scores(self, threshold):
+        """Test the index returns exactly the signatures calculate_match_score passes"""
+        rng = random.Random(0)
+        signatures = [(f"approach_{i}", random_signature(rng)) for i in range(60)]
+        index = SignatureIndex(signatures)
+
+        for _ in range(50):
+            task = random_task(rng)
+            expected = {
+                aid: calculate_match_score(task, sig)
+                for aid, sig in signatures
+                if calculate_match_score(task, sig) >= threshold
+            }
+
+            matches = index.match(task, threshold=threshold, limit=None)
+
+            assert dict(matches) == pytest.approx(expected)
+            scores = [score for _, score in matches]
+            assert scores == sorted(scores, reverse=True)
+
+    def test_limit_keeps_best_matches(self):
+        """Test a limited match returns the top of the full result"""
+        rng = random.Random(1)
+        index = SignatureIndex([(f"approach_{i}", random_signature(rng)) for i in range(30)])
+        task = random_task(rng)
+
+        full = index.match(task, threshold=0.0, limit=None)
+
+        assert index.match(task, threshold=0.0, limit=5) == full[:5]
+
+    def test_empty_index(self):
+        """Test an index without signatures matches nothing"""
+        index = SignatureIndex([])
+
+        assert len(index) == 0
+        assert index.match(random_task(random.Random(2)), threshold=0.0) == []
@@ -0,0 +1,133 @@
+"""
+Unit tests for dynamic approach manager
+Tests write-back of execution metrics through the bounded approach cache
+"""
+
+import gc
+import weakref
+from datetime import datetime
+from src.approach_patterns import (
+    ApproachPattern,
+    PatternSignature,
+    StyleCharacteristics,
+    PerformanceMetrics
+)
+from src.approach_storage import ApproachStorage
+from src.dynamic_approach_manager import DynamicApproachManager
+
+
+def make_approach(approach_id):
+    """Build a minimal approach with empty metrics"""
+    now = datetime.now()
+    return ApproachPattern(
+        id=approach_id,
+        name=approach_id,
+        version=1,
+        created_at=now,
+        last_updated=now,
+        pattern_signature=PatternSignature(
+            domain_weights={'writing': 0.9},
+            complexity_min=0.0,
+            complexity_max=1.0,
+            keyword_patterns=['guide'],
+            keyword_weights={'guide': 0.9},
+            output_types=['guide'],
+            requires_code=False,
+            requires_examples=False,
+            requires_theory=False
+        ),
+        style_characteristics=StyleCharacteristics(
+            structure_type="sequential_steps",
+            section_count=(3, 7),
+            tone="educational",
+            voice="second_person",
+            depth_level="moderate",
+            explanation_style="practical",
+            example_density="medium",
+            code_style=None,
+            use_headers=True,
+            use_bullets=False,
+            use_numbered_lists=True,
+            use_tables=False,
+            include_summary=True,
+            include_tldr=False,
+            include_prerequisites=False,
+            include_next_steps=False
+        ),
+        performance_metrics=PerformanceMetrics(
+            usage_count=0,
+            first_used=now,
+            last_used=now,
+            avg_quality=0.0,
+            min_quality=0.0,
+            max_quality=0.0,
+            quality_std_dev=0.0,
+            success_count=0,
+            failure_count=0,
+            success_rate=0.0,
+            vs_alternatives={},
+            recent_quality_trend="new"
+        )
+    )
+
+
+class TestMetricWriteBack:
+    """Tests for batched execution metrics"""
+
+    def test_metrics_survive_cache_eviction(self, tmp_path):
+        """Test pending metrics are kept when the approach leaves the cache"""
+        manager = DynamicApproachManager(str(tmp_path), cache_size=1)
+        manager.create_approach(make_approach("approach_a"))
+        manager.create_approach(make_approach("approach_b"))
+
+        # Alternate so each record evicts the other approach from the cache
+        for approach_id in ("approach_a", "approach_b", "approach_a", "approach_b"):
+            assert manager.record_execution(approach_id, 0.8, True)
+
+        assert manager.get_approach("approach_a").performance_metrics.usage_count == 2
+        assert manager.flush_metrics()
+
+        storage = ApproachStorage(str(tmp_path))
+        assert storage.load_approach("approach_a").performance_metrics.usage_count == 2
+        assert storage.load_approach("approach_b").performance_metrics.usage_count == 2
+
+    def test_list_approaches_includes_pending_metrics(self, tmp_path):
+        """Test listing returns the in-memory copy with unsaved metrics"""
+        manager = DynamicApproachManager(str(tmp_path), cache_size=1)
+        manager.create_approach(make_approach("approach_a"))
+        manager.create_approach(make_approach("approach_b"))
+
+        manager.record_execution("approach_a", 0.8, True)
+        manager.get_approach("approach_b")
+
+        approaches = {a.id: a for a in manager.list_approaches()}
+        assert approaches["approach_a"].performance_metrics.usage_count == 1
+
+
+class TestManagerLifecycle:
+    """Tests for saving pending metrics when a manager goes away"""
+
+    def test_close_saves_pending_metrics(self, tmp_path):
+        """Test close() writes metrics that were still pending"""
+        manager = DynamicApproachManager(str(tmp_path))
+        manager.create_approach(make_approach("approach_a"))
+        manager.record_execution("approach_a", 0.8, True)
+
+        assert manager.close()
+
+        storage = ApproachStorage(str(tmp_path))
+        assert storage.load_approach("approach_a").performance_metrics.usage_count == 1
+
+    def test_unclosed_manager_is_collected(self, tmp_path):
+        """Test the exit hook does not keep a manager alive, and collection saves its metrics"""
+        manager = DynamicApproachManager(str(tmp_path))
+        manager.create_approach(make_approach("approach_a"))
+        manager.record_execution("approach_a", 0.8, True)
+        manager_ref = weakref.ref(manager)
+
+        del manager
+        gc.collect()
+
+        assert manager_ref() is None
+        storage = ApproachStorage(str(tmp_path))
+        assert storage.load_approach("approach_a").performance_metrics.usage_count == 1
@@ -0,0 +1,244 @@
+"""
+Unit tests for execution history module
+Tests daily JSONL storage and its SQLite index
+"""
+
+import gc
+import weakref
+import pytest
+from datetime import datetime, timedelta
+from src import json_codec
+from src.approach_patterns import ExecutionRecord, TaskContext, ContentFeatures
+from src.execution_history import ExecutionHistory, ARCHIVE_SUFFIX
+
+
+def make_record(record_id, approach_id="approach_a", quality=0.85, timestamp=None):
+    """Build an execution record with fixed task and content features"""
+    return ExecutionRecord(
+        record_id=record_id,
+        timestamp=timestamp or datetime.now(),
+        task_context=TaskContext(
+            prompt="Write a tutorial on Python functions",
+            domain_weights={'writing': 0.8, 'coding': 0.6},
+            complexity=0.5,
+            keywords=['tutorial', 'python'],
+            output_type='tutorial',
+            estimated_duration=2.0
+        ),
+        specialist_id="specialist_001",
+        approach_id=approach_id,
+        quality_target=0.8,
+        actual_quality=quality,
+        success=quality >= 0.7,
+        execution_time_ms=1500,
+        content_features=ContentFeatures(
+            section_count=5,
+            has_code_blocks=True,
+            code_block_count=3,
+            has_numbered_list=True,
+            has_bullets=False,
+            has_tables=False,
+            total_length=2500,
+            avg_section_length=500,
+            detected_tone="educational",
+            formality_score=0.7,
+            explanation_ratio=0.6,
+            example_ratio=0.3,
+            code_ratio=0.1
+        )
+    )
+
+
+def write_daily_file(history, day, records):
+    """Write records straight to a daily file, bypassing the index"""
+    filepath = history._get_daily_file_path(day)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, 'ab') as f:
+        for record in records:
+            f.write(json_codec.dumps(record.to_dict()) + b'\n')
+    return filepath
+
+
+@pytest.fixture
+def history(tmp_path):
+    """History stored under a temporary directory, closed after the test"""
+    history = ExecutionHistory(str(tmp_path))
+    yield history
+    history.close()
+
+
+class TestRecordQueries:
+    """Tests for recording and querying through the index"""
+
+    def test_round_trip(self, history):
+        """Test recorded executions come back through filtered queries"""
+        history.record_execution(make_record("r1", "approach_a", 0.9))
+        history.record_execution(make_record("r2", "approach_b", 0.5))
+        history.record_execution(make_record("r3", "approach_a", 0.6))
+
+        assert [r.record_id for r in history.get_records()] == ["r1", "r2", "r3"]
+        assert [r.record_id for r in history.get_approach_history("approach_a")] == ["r1", "r3"]
+        assert [r.record_id for r in history.get_records(min_quality=0.55)] == ["r1", "r3"]
+        assert [r.record_id for r in history.get_records(limit=2)] == ["r1", "r2"]
+        assert history.get_statistics()['total_records'] == 3
+
+    def test_round_trip_preserves_record(self, history):
+        """Test a stored record decodes to an equal record"""
+        record = make_record("r1")
+        history.record_execution(record)
+
+        assert history.get_records()[0].to_dict() == record.to_dict()
+
+
+class TestIndexReconciliation:
+    """Tests for keeping the index in step with the daily files"""
+
+    def test_backfills_missing_index(self, tmp_path):
+        """Test history written without an index is indexed on open"""
+        history = ExecutionHistory(str(tmp_path))
+        history.record_execution(make_record("r1"))
+        history.record_execution(make_record("r2"))
+        history.close()
+
+        for path in tmp_path.glob("index.db*"):
+            path.unlink()
+
+        history = ExecutionHistory(str(tmp_path))
+        try:
+            assert [r.record_id for r in history.get_records()] == ["r1", "r2"]
+        finally:
+            history.close()
+
+    def test_reindexes_stale_file(self, tmp_path):
+        """Test a record that reached disk but not the index is found on open"""
+        history = ExecutionHistory(str(tmp_path))
+        history.record_execution(make_record("r1"))
+        history.close()
+
+        # As if the process died between the write and the index insert
+        write_daily_file(history, datetime.now(), [make_record("r2")])
+
+        history = ExecutionHistory(str(tmp_path))
+        try:
+            assert [r.record_id for r in history.get_records()] == ["r1", "r2"]
+            assert history.get_statistics()['total_records'] == 2
+        finally:
+            history.close()
+
+    def test_indexes_copied_in_files(self, tmp_path):
+        """Test daily files added next to an existing index are indexed on open"""
+        history = ExecutionHistory(str(tmp_path))
+        history.record_execution(make_record("r2"))
+        history.close()
+
+        yesterday = datetime.now() - timedelta(days=1)
+        write_daily_file(history, yesterday, [make_record("r1", timestamp=yesterday)])
+
+        history = ExecutionHistory(str(tmp_path))
+        try:
+            assert [r.record_id for r in history.get_records()] == ["r1", "r2"]
+        finally:
+            history.close()
+
+    def test_drops_rows_of_deleted_files(self, tmp_path):
+        """Test removing a daily file removes its records from the index"""
+        history = ExecutionHistory(str(tmp_path))
+        history.record_execution(make_record("r1"))
+        history.close()
+
+        history._get_daily_file_path(datetime.now()).unlink()
+
+        history = ExecutionHistory(str(tmp_path))
+        try:
+            assert history.get_statistics()['total_records'] == 0
+        finally:
+            history.close()
+
+    def test_index_failure_keeps_record(self, history, monkeypatch):
+        """Test a written record stays queryable when indexing it fails"""
+        def failing_index(*args):
+            raise RuntimeError("index unavailable")
+
+        monkeypatch.setattr(history, "_index_record", failing_index)
+        assert history.record_execution(make_record("r1"))
+        monkeypatch.undo()
+
+        assert history.record_execution(make_record("r2"))
+        assert [r.record_id for r in history.get_records()] == ["r1", "r2"]
+        assert history.get_statistics()['total_records'] == 2
+
+    def test_rebuild_index(self, history):
+        """Test rebuild_index restores rows missing from the index"""
+        history.record_execution(make_record("r1"))
+        history.record_execution(make_record("r2"))
+        history._open_index().execute("DELETE FROM records")
+
+        history.rebuild_index()
+
+        assert [r.record_id for r in history.get_records()] == ["r1", "r2"]
+
+
+class TestArchiving:
+    """Tests for gzip-archiving old daily files"""
+
+    def test_archived_records_stay_queryable(self, history):
+        """Test records read back unchanged after their daily file is archived"""
+        old_day = datetime.now() - timedelta(days=100)
+        old_records = [make_record("r1", timestamp=old_day), make_record("r2", timestamp=old_day)]
+        filepath = write_daily_file(history, old_day, old_records)
+        history.rebuild_index()
+        history.record_execution(make_record("r3"))
+
+        assert history.compact_old_records(days_to_keep=90) == 1
+
+        assert not filepath.exists()
+        assert filepath.with_name(filepath.name + ARCHIVE_SUFFIX).exists()
+        records = history.get_records(start_date=old_day - timedelta(days=1))
+        assert [r.record_id for r in records] == ["r1", "r2", "r3"]
+        assert records[0].to_dict() == old_records[0].to_dict()
+
+        # A second pass leaves the archive alone
+        assert history.compact_old_records(days_to_keep=90) == 0
+
+    def test_archive_survives_reopen(self, tmp_path):
+        """Test reconciliation on open keeps archived records in the index"""
+        old_day = datetime.now() - timedelta(days=100)
+        history = ExecutionHistory(str(tmp_path))
+        write_daily_file(history, old_day, [make_record("r1", timestamp=old_day)])
+        history.rebuild_index()
+        history.compact_old_records(days_to_keep=90)
+        history.close()
+
+        with ExecutionHistory(str(tmp_path)) as history:
+            records = history.get_records(start_date=old_day - timedelta(days=1))
+            assert [r.record_id for r in records] == ["r1"]
+            assert history.get_statistics()['total_records'] == 1
+
+
+class TestHistoryLifecycle:
+    """Tests for releasing the daily file handle and index"""
+
+    def test_context_manager_closes(self, tmp_path):
+        """Test leaving the with block releases the handle and index"""
+        with ExecutionHistory(str(tmp_path)) as history:
+            history.record_execution(make_record("r1"))
+            assert history.current_file is not None
+
+        assert history.current_file is None
+        assert history._db is None
+
+        with ExecutionHistory(str(tmp_path)) as history:
+            assert [r.record_id for r in history.get_records()] == ["r1"]
+
+    def test_unclosed_history_is_collected(self, tmp_path):
+        """Test the exit hook does not keep a history alive"""
+        history = ExecutionHistory(str(tmp_path))
+        history.record_execution(make_record("r1"))
+        history_ref = weakref.ref(history)
+
+        del history
+        gc.collect()
+
+        assert history_ref() is None
+        with ExecutionHistory(str(tmp_path)) as history:
+            assert [r.record_id for r in history.get_records()] == ["r1"]
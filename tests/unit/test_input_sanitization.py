@@ -5,6 +5,7 @@ Tests security against encoding issues, injection, and malformed inputs
 
 import pytest
 import json
+from src import json_codec
 from src.input_sanitization import (
     InputSanitizer,
     SanitizationError,
@@ -262,6 +263,22 @@ class TestJsonSanitization:
         json_str = f'{{"text": "{escaped}"}}'
         parsed = json.loads(json_str)
         assert "Line 1" in parsed['text']
+    
+    def test_matches_serializer_escaping(self):
+        """Test escaped text decodes back to exactly the original"""
+        sanitizer = InputSanitizer()
+        
+        for text in ['say "hi"\\', "tab\tbell\x07del\x7f", "émojis 🎉 \u2028"]:
+            escaped = sanitizer.sanitize_for_json(text)
+            
+            assert json.loads(f'"{escaped}"') == text
+    
+    def test_direct_serialization(self):
+        """Test whole documents are built by the serializer without pre-escaping"""
+        for text in ['say "hi"\\', "tab\tbell\x07del\x7f", "émojis 🎉 \u2028"]:
+            document = json_codec.dumps({"text": text})
+            
+            assert json.loads(document) == {"text": text}
 
 
 class TestQualitySanitization:
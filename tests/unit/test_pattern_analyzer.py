@@ -0,0 +1,232 @@
+"""
+Unit tests for pattern analyzer
+Tests the clustering similarity graph against a pairwise reference, and the
+clustering methods of pattern discovery
+"""
+
+import math
+import random
+from datetime import datetime
+import numpy as np
+import pytest
+from src import pattern_analyzer
+from src.approach_patterns import ExecutionRecord, TaskContext, ContentFeatures
+from src.execution_history import ExecutionHistory
+from src.pattern_analyzer import (
+    FEATURE_KEYS,
+    PatternAnalyzer,
+    _hdbscan_class,
+    _radius_neighbor_edges,
+    _similarity_edges
+)
+
+CONTENT_COLUMNS = slice(len(FEATURE_KEYS) - 8, len(FEATURE_KEYS))
+
+# Pairs whose similarity is this close to the threshold may land on either
+# side of it in float32
+THRESHOLD_TOLERANCE = 1e-4
+
+
+def random_features(seed, count, missing_content=False):
+    """Feature matrix of records scattered around a few centers (NaN for missing content)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.random((4, len(FEATURE_KEYS)))
+    features = centers[rng.integers(0, 4, count)] + rng.normal(0.0, 0.15, (count, len(FEATURE_KEYS)))
+    features = np.clip(features, 0.0, 1.0).astype(np.float32)
+    if missing_content:
+        features[rng.random(count) < 0.3, CONTENT_COLUMNS] = np.nan
+    return features
+
+
+def split_features(features):
+    """(X, present) as the clustering code builds them"""
+    present = ~np.isnan(features)
+    return np.where(present, features, np.float32(0.0)), present
+
+
+def reference_similarity(features):
+    """Cosine similarity of every pair over the features both records have, in float64"""
+    count = len(features)
+    similarity = np.zeros((count, count))
+    for i in range(count):
+        for j in range(count):
+            dot = sq_i = sq_j = 0.0
+            for a, b in zip(features[i].tolist(), features[j].tolist()):
+                if not (math.isnan(a) or math.isnan(b)):
+                    dot += a * b
+                    sq_i += a * a
+                    sq_j += b * b
+            if sq_i > 0 and sq_j > 0:
+                similarity[i, j] = dot / math.sqrt(sq_i * sq_j)
+    return similarity
+
+
+def make_record(rng, record_id, kind):
+    """Successful execution of a coding tutorial (with content features) or a research report (without)"""
+    def jitter(value):
+        return value + rng.uniform(-0.05, 0.05)
+
+    if kind == "tutorial":
+        domains = {'coding': jitter(0.9), 'writing': jitter(0.4)}
+        complexity, output_type = jitter(0.6), 'tutorial'
+        content = ContentFeatures(
+            section_count=6,
+            has_code_blocks=True,
+            code_block_count=4,
+            has_numbered_list=True,
+            has_bullets=False,
+            has_tables=False,
+            total_length=3000,
+            avg_section_length=500,
+            detected_tone="educational",
+            formality_score=jitter(0.6),
+            explanation_ratio=jitter(0.5),
+            example_ratio=jitter(0.3),
+            code_ratio=jitter(0.3)
+        )
+    else:
+        domains = {'research': jitter(0.9), 'analysis': jitter(0.7)}
+        complexity, output_type, content = jitter(0.3), 'report', None
+
+    return ExecutionRecord(
+        record_id=record_id,
+        timestamp=datetime.now(),
+        task_context=TaskContext(
+            prompt="",
+            domain_weights=domains,
+            complexity=complexity,
+            keywords=[],
+            output_type=output_type,
+            estimated_duration=1.0
+        ),
+        specialist_id="specialist_001",
+        approach_id=f"approach_{kind}",
+        quality_target=0.8,
+        actual_quality=0.9,
+        success=True,
+        execution_time_ms=1000,
+        content_features=content
+    )
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    """Analyzer over a history of interleaved tutorial and report executions"""
+    rng = random.Random(0)
+    history = ExecutionHistory(str(tmp_path / "history"))
+    for i in range(24):
+        kind = "tutorial" if i % 2 else "report"
+        history.record_execution(make_record(rng, f"{kind}_{i}", kind))
+    yield PatternAnalyzer(history, patterns_path=str(tmp_path / "patterns"))
+    history.close()
+
+
+def cluster_ids(clusters):
+    """Record ids of each cluster, as sets"""
+    return [{r.record_id for r in cluster.records} for cluster in clusters]
+
+
+def assert_edges_match(edges, similarity, threshold):
+    """Check edges against the reference, ignoring pairs within rounding of the threshold"""
+    rows, cols = edges
+    found = set(zip(rows.tolist(), cols.tolist()))
+    expected = {
+        (i, j)
+        for i, j in zip(*np.nonzero(similarity >= threshold))
+        if i < j
+    }
+    for i, j in found ^ expected:
+        assert abs(similarity[i, j] - threshold) < THRESHOLD_TOLERANCE, (i, j)
+
+
+class TestSimilarityEdges:
+    """Tests for the blocked similarity graph"""
+
+    @pytest.mark.parametrize("missing_content", [False, True])
+    @pytest.mark.parametrize("threshold", [0.8, 0.95])
+    def test_blocked_edges_match_reference(self, monkeypatch, missing_content, threshold):
+        """Test edges built block by block equal the edges of the full similarity matrix"""
+        monkeypatch.setattr(pattern_analyzer, "SIMILARITY_BLOCK_ROWS", 7)
+        features = random_features(0, 60, missing_content)
+
+        edges = _similarity_edges(*split_features(features), threshold)
+
+        assert len(edges[0]) > 0
+        assert_edges_match(edges, reference_similarity(features), threshold)
+
+    def test_each_edge_listed_once(self, monkeypatch):
+        """Test only the upper triangle is kept: no self-loops, no mirrored pairs"""
+        monkeypatch.setattr(pattern_analyzer, "SIMILARITY_BLOCK_ROWS", 7)
+        features = random_features(1, 60, missing_content=True)
+
+        rows, cols = _similarity_edges(*split_features(features), 0.8)
+
+        assert (rows < cols).all()
+        pairs = list(zip(rows.tolist(), cols.tolist()))
+        assert len(set(pairs)) == len(pairs)
+
+
+class TestRadiusNeighborEdges:
+    """Tests for similarity edges found through the radius-neighbor index"""
+
+    @pytest.fixture(autouse=True)
+    def small_histories_use_index(self, monkeypatch):
+        """Use the index whatever the history size"""
+        monkeypatch.setattr(pattern_analyzer, "NEIGHBOR_INDEX_MIN_RECORDS", 0)
+
+    @pytest.mark.parametrize("threshold", [0.8, 0.95])
+    def test_matches_reference(self, threshold):
+        """Test the index finds the same edges as the full similarity matrix"""
+        features = random_features(2, 80)
+        features[[5, 40]] = 0.0  # Zero vectors are similar to nothing
+
+        edges = _radius_neighbor_edges(*split_features(features), threshold)
+
+        assert (edges[0] < edges[1]).all()
+        assert not np.isin([5, 40], np.concatenate(edges)).any()
+        assert_edges_match(edges, reference_similarity(features), threshold)
+
+    def test_declines_missing_features_and_non_positive_thresholds(self):
+        """Test the index is skipped when similarities need per-pair magnitudes"""
+        X, present = split_features(random_features(3, 20, missing_content=True))
+        assert not present.all()
+        assert _radius_neighbor_edges(X, present, 0.8) is None
+
+        X, present = split_features(random_features(3, 20))
+        assert _radius_neighbor_edges(X, present, 0.0) is None
+
+
+class TestDiscoverPatterns:
+    """Tests for clustering methods of discover_patterns"""
+
+    def test_threshold_clusters_by_kind(self, analyzer):
+        """Test similarity-graph clustering separates the two kinds of execution"""
+        clusters = analyzer.discover_patterns(min_cluster_size=5, method="threshold")
+
+        assert cluster_ids(clusters) == [
+            {f"report_{i}" for i in range(0, 24, 2)},
+            {f"tutorial_{i}" for i in range(1, 24, 2)}
+        ]
+
+    @pytest.mark.skipif(_hdbscan_class() is None, reason="needs scikit-learn 1.3+")
+    def test_density_matches_threshold(self, analyzer):
+        """Test density clustering finds the same clusters on well-separated executions"""
+        threshold = analyzer.discover_patterns(min_cluster_size=5, method="threshold")
+        density = analyzer.discover_patterns(min_cluster_size=5, method="density")
+
+        assert cluster_ids(density) == cluster_ids(threshold)
+
+    def test_density_without_hdbscan_falls_back(self, analyzer, monkeypatch):
+        """Test density clustering falls back to threshold clustering without HDBSCAN"""
+        monkeypatch.setattr(pattern_analyzer, "_hdbscan_class", lambda: None)
+
+        clusters = analyzer.discover_patterns(min_cluster_size=5, method="density")
+
+        assert cluster_ids(clusters) == cluster_ids(
+            analyzer.discover_patterns(min_cluster_size=5, method="threshold")
+        )
+
+    def test_unknown_method(self, analyzer):
+        """Test an unknown clustering method is rejected"""
+        with pytest.raises(ValueError):
+            analyzer.discover_patterns(min_cluster_size=5, method="kmeans")
@@ -0,0 +1,274 @@
+"""
+Unit tests for stigmergic coordination module
+Tests signal deposits, lazy decay and persistence of the signal board
+"""
+
+import gc
+import os
+import time
+import weakref
+import pytest
+from src import json_codec, stigmergic_coordination
+from src.stigmergic_coordination import StigmergicBoard
+
+WEEK = 7 * 24 * 3600.0
+
+
+@pytest.fixture
+def board(tmp_path):
+    """Board stored under a temporary directory, closed after the test"""
+    board = StigmergicBoard(storage_path=str(tmp_path))
+    yield board
+    board.close()
+
+
+def age_signals(board, task_id, seconds):
+    """Move every signal of a task back in time"""
+    board.signals[task_id].timestamp[:board.signals[task_id].size] -= seconds
+    board.signals[task_id].reads.clear()
+
+
+def board_columns(board):
+    """Every task's stored signals, one list per field"""
+    return {task_id: columns.to_columns() for task_id, columns in board.signals.items()}
+
+
+class TestDeposits:
+    """Tests for depositing signals"""
+
+    def test_deposit_on_expired_signal_starts_fresh(self, board, tmp_path):
+        """Test a deposit onto a decayed-away signal replaces it"""
+        board.deposit_signal("task", "approach", 0.5, "x")
+        age_signals(board, "task", WEEK)
+
+        board.deposit_signal("task", "approach", 0.6, "y")
+
+        signals = board.read_signals("task", "y")
+        assert len(signals) == 1
+        assert signals[0]["strength"] == pytest.approx(60.0, abs=0.01)
+        assert signals[0]["success_metric"] == pytest.approx(0.6)
+        assert signals[0]["from_self"]
+
+        # The prune and the fresh signal survive a reload
+        board.close()
+        reloaded = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            signals = reloaded.read_signals("task", "y")
+            assert [s["approach"] for s in signals] == ["approach"]
+            assert signals[0]["strength"] == pytest.approx(60.0, abs=0.01)
+        finally:
+            reloaded.close()
+
+    def test_deposit_reinforces_live_signal(self, board):
+        """Test a successful deposit amplifies a live signal"""
+        board.deposit_signal("task", "approach", 0.5, "x")
+        board.deposit_signal("task", "approach", 0.8, "y")
+
+        signals = board.read_signals("task", "x")
+        assert signals[0]["strength"] == pytest.approx(100.0, abs=0.01)
+
+
+class TestJournal:
+    """Tests for journaling mutations and folding them into the snapshot"""
+
+    def test_replay_restores_board(self, board, tmp_path):
+        """Test a board reloaded from snapshot and journal equals the live board"""
+        board.deposit_signal("task_a", "approach_1", 0.8, "x")
+        board.deposit_signal("task_a", "approach_2", 0.4, "y")
+        board.deposit_signal("task_b", "approach_1", 0.9, "x")
+        # Snapshot these; the mutations below only reach the journal
+        board.close()
+
+        board.deposit_signal("task_a", "approach_1", 0.9, "y")
+        board.deposit_signal("task_b", "approach_2", 0.3, "y")
+        age_signals(board, "task_b", WEEK)
+        board.decay_signals()
+        board.flush()
+
+        assert (tmp_path / "signals.jsonl").exists()
+        reloaded = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            assert "task_b" not in reloaded.signals
+            assert board_columns(reloaded) == board_columns(board)
+        finally:
+            reloaded.close()
+
+    def test_replay_skips_torn_line(self, board, tmp_path):
+        """Test an interrupted final journal write does not block loading"""
+        board.deposit_signal("task", "approach", 0.8, "x")
+        board.flush()
+        with open(tmp_path / "signals.jsonl", 'ab') as f:
+            f.write(b'{"op": "upsert", "task": "ta')
+
+        reloaded = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            assert board_columns(reloaded) == board_columns(board)
+        finally:
+            reloaded.close()
+
+    def test_compaction_folds_journal_into_snapshot(self, board, tmp_path, monkeypatch):
+        """Test a long journal is replaced by an equivalent snapshot"""
+        monkeypatch.setattr(stigmergic_coordination, "JOURNAL_COMPACT_EVERY", 3)
+        for i in range(4):
+            board.deposit_signal("task", f"approach_{i}", 0.8, "x")
+
+        board._maybe_compact_journal()
+
+        assert board._journal_entries == 0
+        assert not (tmp_path / "signals.jsonl").exists()
+        reloaded = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            assert board_columns(reloaded) == board_columns(board)
+        finally:
+            reloaded.close()
+
+
+class TestSnapshots:
+    """Tests for the MessagePack snapshot and its JSON fallback"""
+
+    def fill(self, board):
+        """Deposit signals on two tasks"""
+        board.deposit_signal("task_a", "approach_1", 0.8, "x")
+        board.deposit_signal("task_a", "approach_2", 0.4, "y")
+        board.deposit_signal("task_b", "approach_1", 0.9, "x")
+
+    def test_msgpack_round_trip(self, board, tmp_path):
+        """Test a MessagePack snapshot reloads to an equal board"""
+        self.fill(board)
+        board.close()
+
+        assert (tmp_path / "signals.msgpack").exists()
+        assert not (tmp_path / "signals.json").exists()
+        reloaded = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            assert board_columns(reloaded) == board_columns(board)
+        finally:
+            reloaded.close()
+
+    def test_json_fallback_round_trip(self, tmp_path, monkeypatch):
+        """Test boards without msgpack save and reload a JSON snapshot"""
+        monkeypatch.setattr(stigmergic_coordination, "msgpack", None)
+        board = StigmergicBoard(storage_path=str(tmp_path))
+        self.fill(board)
+        board.close()
+
+        assert (tmp_path / "signals.json").exists()
+        assert not (tmp_path / "signals.msgpack").exists()
+        reloaded = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            assert board_columns(reloaded) == board_columns(board)
+        finally:
+            reloaded.close()
+
+    def test_newer_json_snapshot_is_migrated(self, tmp_path, monkeypatch):
+        """Test a JSON snapshot saved after the MessagePack one wins and is migrated"""
+        board = StigmergicBoard(storage_path=str(tmp_path))
+        board.deposit_signal("task", "stale", 0.8, "x")
+        board.close()
+
+        with monkeypatch.context() as m:
+            m.setattr(stigmergic_coordination, "msgpack", None)
+            board = StigmergicBoard(storage_path=str(tmp_path / "json"))
+            self.fill(board)
+            board.close()
+        json_path = tmp_path / "signals.json"
+        (tmp_path / "json" / "signals.json").replace(json_path)
+        msgpack_mtime = (tmp_path / "signals.msgpack").stat().st_mtime
+        os.utime(json_path, (msgpack_mtime + 1, msgpack_mtime + 1))
+
+        reloaded = StigmergicBoard(storage_path=str(tmp_path))
+        assert board_columns(reloaded) == board_columns(board)
+
+        # The next compaction writes MessagePack and drops the JSON snapshot
+        reloaded.deposit_signal("task_b", "approach_2", 0.7, "y")
+        reloaded.close()
+        assert not json_path.exists()
+        migrated = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            assert board_columns(migrated) == board_columns(reloaded)
+        finally:
+            migrated.close()
+
+    def test_loads_original_signal_dicts(self, tmp_path):
+        """Test a signals.json holding one Signal dict per signal still loads"""
+        now = time.time()
+        signals = {
+            "task": [
+                {"task_id": "task", "approach": "approach_1", "strength": 80.0,
+                 "timestamp": now, "deposited_by": "x", "success_metric": 0.8},
+                {"task_id": "task", "approach": "approach_2", "strength": 40.0,
+                 "timestamp": now, "deposited_by": "y", "success_metric": 0.4}
+            ]
+        }
+        (tmp_path / "signals.json").write_bytes(json_codec.dumps(signals))
+
+        board = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            assert board_columns(board) == {
+                "task": {
+                    "approach": ["approach_1", "approach_2"],
+                    "deposited_by": ["x", "y"],
+                    "strength": [80.0, 40.0],
+                    "timestamp": [now, now],
+                    "success_metric": [0.8, 0.4]
+                }
+            }
+            assert board.strongest_signal("task") == "approach_1"
+
+            # Rewritten in the column-wise layout on the next compaction
+            board.deposit_signal("task", "approach_3", 0.6, "x")
+        finally:
+            board.close()
+        reloaded = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            assert board_columns(reloaded) == board_columns(board)
+        finally:
+            reloaded.close()
+
+
+class TestBoardLifecycle:
+    """Tests for the background flusher and shutdown"""
+
+    def test_close_drains_journal_and_stops_thread(self, tmp_path):
+        """Test close() folds queued deposits into the snapshot and stops the flusher"""
+        board = StigmergicBoard(storage_path=str(tmp_path))
+        board.deposit_signal("task", "approach", 0.8, "x")
+        thread = board._flush_thread
+
+        board.close()
+
+        assert not thread.is_alive()
+        assert not (tmp_path / "signals.jsonl").exists()
+        assert board._pending == []
+
+        reloaded = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            assert [s["approach"] for s in reloaded.read_signals("task", "y")] == ["approach"]
+        finally:
+            reloaded.close()
+
+    def test_unclosed_board_is_collected(self, tmp_path):
+        """Test neither the exit hook nor the flusher keeps a board alive"""
+        board = StigmergicBoard(storage_path=str(tmp_path))
+        board.deposit_signal("task", "approach", 0.8, "x")
+        thread = board._flush_thread
+        board_ref = weakref.ref(board)
+
+        del board
+        for _ in range(50):
+            # The flusher holds the board only while it is writing
+            gc.collect()
+            if board_ref() is None:
+                break
+            time.sleep(0.01)
+
+        assert board_ref() is None
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+        # Entries still queued at collection reached the journal
+        reloaded = StigmergicBoard(storage_path=str(tmp_path))
+        try:
+            assert [s["approach"] for s in reloaded.read_signals("task", "y")] == ["approach"]
+        finally:
+            reloaded.close()